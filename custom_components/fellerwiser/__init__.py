@@ -1,11 +1,40 @@
 """The Feller Wiser integration."""
 from __future__ import annotations
 
+import asyncio
+
+import aiohttp
+
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import Platform
 from homeassistant.core import HomeAssistant
+from homeassistant.exceptions import ConfigEntryNotReady
+from homeassistant.helpers.aiohttp_client import async_create_clientsession
+import homeassistant.helpers.config_validation as cv
+from homeassistant.helpers.typing import ConfigType
 
-from .const import DOMAIN
+from .api import FellerApi
+from .cache import DiscoveryCache
+from .capture import FrameRecorder
+from .const import (
+    CONF_CAPTURE_FRAMES,
+    CONF_FRAME_LOG_INTERVAL,
+    CONF_HEARTBEAT_INTERVAL,
+    CONF_MAX_CONCURRENT_REQUESTS,
+    CONF_PONG_TIMEOUT,
+    CONF_SCENE_OPTIMIZER,
+    DEFAULT_CAPTURE_FRAMES,
+    DEFAULT_FRAME_LOG_INTERVAL,
+    DEFAULT_HEARTBEAT_INTERVAL,
+    DEFAULT_MAX_CONCURRENT_REQUESTS,
+    DEFAULT_PONG_TIMEOUT,
+    DEFAULT_SCENE_OPTIMIZER,
+    DOMAIN,
+)
+from .coordinator import FellerCoordinator
+from .hub import FellerHub
+from .scenes import SceneIndex
+from .services import async_setup_services
 
 from datetime import timedelta
 
@@ -17,23 +46,142 @@ SCAN_INTERVAL = timedelta(seconds=5)
 
 # TODO List the platforms that you want to support.
 # For your initial PR, limit it to 1 platform.
-PLATFORMS: list[Platform] = [Platform.LIGHT, Platform.COVER, Platform.BUTTON]
+PLATFORMS: list[Platform] = [
+    Platform.LIGHT,
+    Platform.COVER,
+    Platform.BUTTON,
+    Platform.SENSOR,
+]
+
+CONFIG_SCHEMA = cv.config_entry_only_config_schema(DOMAIN)
+
+
+async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
+    """Set up the Feller Wiser services."""
+    async_setup_services(hass)
+    return True
 
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Set up Feller Wiser from a config entry."""
-    # TODO Store an API object for your platforms to access
-    # hass.data[DOMAIN][entry.entry_id] = MyApi(...)
+    host = entry.data["host"]
+    apikey = entry.data["apikey"]
+
+    # one keep-alive session per gateway, shared by all entities; created
+    # during entry setup, it is detached when the entry is unloaded
+    session = async_create_clientsession(hass)
+    api = FellerApi(
+        session,
+        host,
+        apikey,
+        entry.options.get(
+            CONF_MAX_CONCURRENT_REQUESTS, DEFAULT_MAX_CONCURRENT_REQUESTS
+        ),
+    )
+
+    entry.async_on_unload(api.breaker.stop)
+
+    # seed every entity from one bulk fetch instead of a GET per entity
+    coordinator = FellerCoordinator(hass, api)
+    # entities turn unavailable while the breaker is open
+    entry.async_on_unload(
+        api.breaker.add_listener(coordinator.async_update_listeners)
+    )
+    cache = DiscoveryCache(hass, entry.entry_id)
+
+    topology = await cache.async_load()
+    if topology is None:
+        # first start: nothing to show before the gateway has answered
+        await coordinator.async_config_entry_first_refresh()
+        try:
+            await coordinator.async_refresh_scenes()
+        except (aiohttp.ClientError, asyncio.TimeoutError) as err:
+            raise ConfigEntryNotReady(f"Error fetching scenes: {err}") from err
+        await cache.async_save(coordinator.topology())
+    else:
+        # create the entities from the cache, the live state follows below
+        coordinator.async_set_topology(topology)
+
+    hub = FellerHub(
+        host,
+        apikey,
+        api,
+        coordinator,
+        entry.options.get(CONF_HEARTBEAT_INTERVAL, DEFAULT_HEARTBEAT_INTERVAL),
+        entry.options.get(CONF_PONG_TIMEOUT, DEFAULT_PONG_TIMEOUT),
+        entry.options.get(CONF_FRAME_LOG_INTERVAL, DEFAULT_FRAME_LOG_INTERVAL),
+    )
+    hass.data.setdefault(DOMAIN, {})[entry.entry_id] = hub
+    entry.async_on_unload(hub.stop)
+    # a refresh that failed while the gateway was down is not retried on its
+    # own, there is no update interval
+    entry.async_on_unload(api.breaker.add_listener(hub.resync_if_failed))
 
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
-    _LOGGER.info("----------------------blubb-------------------------")
+    entry.async_on_unload(entry.add_update_listener(_async_update_listener))
+
+    if entry.options.get(CONF_CAPTURE_FRAMES, DEFAULT_CAPTURE_FRAMES):
+        hub.recorder = FrameRecorder(
+            hass.config.path(DOMAIN, f"capture-{entry.entry_id}.jsonl")
+        )
+        entry.async_on_unload(hub.recorder.close)
+
+    if entry.options.get(CONF_SCENE_OPTIMIZER, DEFAULT_SCENE_OPTIMIZER):
+        hub.scene_index = SceneIndex()
+        if topology is None:
+            # on a start from the cache, the reconcile builds it
+            entry.async_create_background_task(
+                hass,
+                hub.scene_index.async_build(
+                    api, list(coordinator.state.scenes.values())
+                ),
+                "fellerwiser scene index",
+            )
+
+    if topology is not None:
+        entry.async_create_background_task(
+            hass, _async_reconcile(hub, cache), "fellerwiser reconcile"
+        )
+
+    # start the shared listener once all platforms have registered; the
+    # config entry owns the task and cancels it on unload
+    entry.async_create_background_task(hass, hub.hello(), "fellerwiser websocket")
 
     return True
 
 
+async def _async_update_listener(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Reload the config entry when its options changed."""
+    await hass.config_entries.async_reload(entry.entry_id)
+
+
+async def _async_reconcile(hub: FellerHub, cache: DiscoveryCache) -> None:
+    """Fetch the live topology and state behind a start from the cache."""
+    coordinator = hub.coordinator
+    try:
+        await coordinator.async_refresh_scenes()
+    except (aiohttp.ClientError, asyncio.TimeoutError) as err:
+        _LOGGER.warning("Error fetching scenes, keeping cached ones: %s", err)
+    # notifies the platforms, which add entities for newly found resources
+    await coordinator.async_refresh()
+    if coordinator.last_update_success:
+        await cache.async_save(coordinator.topology())
+    if hub.scene_index is not None:
+        # from the live scenes, unless fetching them failed above
+        await hub.scene_index.async_build(
+            hub.api, list(coordinator.state.scenes.values())
+        )
+
+
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Unload a config entry."""
-    for platform in PLATFORMS:
-      await hass.config_entries.async_forward_entry_unload(entry, platform)
+    if unload_ok := await hass.config_entries.async_unload_platforms(
+        entry, PLATFORMS
+    ):
+        hass.data[DOMAIN].pop(entry.entry_id)
+    return unload_ok
 
-    return True
+
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Drop the discovery cache of a removed config entry."""
+    await DiscoveryCache(hass, entry.entry_id).async_remove()
@@ -0,0 +1,404 @@
+"""REST client for a Feller Wiser µGateway."""
+
+from __future__ import annotations
+
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from collections.abc import AsyncIterator, Awaitable, Callable
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Any
+
+import aiohttp
+
+from .metrics import Metrics
+
+_LOGGER = logging.getLogger(__name__)
+
+# lower values are served first
+PRIORITY_COMMAND = 0
+PRIORITY_REFRESH = 1
+
+# seconds a request may take once it got its slot
+REQUEST_TIMEOUT = 10
+# consecutive connection failures that open the breaker
+BREAKER_THRESHOLD = 3
+# seconds between health probes while the breaker is open
+PROBE_INTERVAL = 15
+
+# target_state field for the gateway's native fade, in milliseconds
+FADE_TIME = "fade_time"
+# target_state fields that only apply to the command they came with
+COMMAND_OPTIONS = (FADE_TIME,)
+
+
+class GatewayUnavailable(aiohttp.ClientConnectionError):
+    """Raised instead of sending a request while the breaker is open."""
+
+
+class RequestScheduler:
+    """Limit the requests in flight to a gateway, serving commands first.
+
+    Requests beyond the limit wait in priority order, so a user pressing a
+    button does not queue behind a bulk refresh.
+    """
+
+    def __init__(self, limit: int) -> None:
+        """Initialize the scheduler."""
+        self.limit = limit
+        self._active = 0
+        self._waiters: list[tuple[int, int, asyncio.Future]] = []
+        self._sequence = itertools.count()
+
+    @property
+    def queued(self) -> int:
+        """Return the number of requests waiting for a slot."""
+        return sum(1 for _, _, future in self._waiters if not future.done())
+
+    @asynccontextmanager
+    async def slot(self, priority: int) -> AsyncIterator[None]:
+        """Hold one of the slots while the block runs."""
+        await self._async_acquire(priority)
+        try:
+            yield
+        finally:
+            self._release()
+
+    async def _async_acquire(self, priority: int) -> None:
+        if self._active < self.limit and not self._waiters:
+            self._active += 1
+            return
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._sequence), future))
+        try:
+            await future
+        except asyncio.CancelledError:
+            if not future.cancelled():
+                # the slot was handed over just before the cancellation
+                self._release()
+            raise
+
+    def _release(self) -> None:
+        self._active -= 1
+        while self._waiters and self._active < self.limit:
+            _, _, future = heapq.heappop(self._waiters)
+            if not future.done():
+                self._active += 1
+                future.set_result(None)
+
+
+class CircuitBreaker:
+    """Stop sending requests to a gateway that keeps failing to answer.
+
+    After threshold consecutive connection errors or timeouts the breaker
+    opens: requests fail right away with GatewayUnavailable instead of piling
+    up behind a hung gateway. While open, probe is called every
+    probe_interval seconds, and the first success closes the breaker again.
+    """
+
+    def __init__(
+        self,
+        probe: Callable[[], Awaitable[Any]],
+        threshold: int = BREAKER_THRESHOLD,
+        probe_interval: float = PROBE_INTERVAL,
+    ) -> None:
+        """Initialize a closed breaker."""
+        self._probe = probe
+        self._threshold = threshold
+        self._probe_interval = probe_interval
+        self._failures = 0
+        self._probe_task: asyncio.Task | None = None
+        self._listeners: list[Callable[[], None]] = []
+
+    @property
+    def is_open(self) -> bool:
+        """Return True while requests are refused."""
+        return self._probe_task is not None
+
+    def add_listener(self, listener: Callable[[], None]) -> Callable[[], None]:
+        """Call listener whenever the breaker opens or closes."""
+        self._listeners.append(listener)
+        return lambda: self._listeners.remove(listener)
+
+    def check(self) -> None:
+        """Raise GatewayUnavailable if the breaker is open."""
+        if self._probe_task is not None:
+            raise GatewayUnavailable("Gateway unavailable, waiting for it to recover")
+
+    def record_success(self) -> None:
+        """Reset the failure count after an answered request."""
+        self._failures = 0
+
+    def record_failure(self) -> None:
+        """Count a failed request and open the breaker at the threshold."""
+        self._failures += 1
+        if self._failures >= self._threshold and self._probe_task is None:
+            _LOGGER.warning(
+                "Gateway did not answer %s requests in a row, pausing requests",
+                self._failures,
+            )
+            self._probe_task = asyncio.get_running_loop().create_task(
+                self._async_probe()
+            )
+            self._notify()
+
+    def stop(self) -> None:
+        """Stop probing, e.g. when the config entry is unloaded."""
+        if self._probe_task is not None:
+            self._probe_task.cancel()
+            self._probe_task = None
+
+    async def _async_probe(self) -> None:
+        while True:
+            await asyncio.sleep(self._probe_interval)
+            try:
+                await self._probe()
+            except (aiohttp.ClientError, asyncio.TimeoutError) as err:
+                _LOGGER.debug("Gateway health probe failed: %s", err)
+                continue
+            break
+        _LOGGER.info("Gateway answers again, resuming requests")
+        self._failures = 0
+        self._probe_task = None
+        self._notify()
+
+    def _notify(self) -> None:
+        for listener in list(self._listeners):
+            listener()
+
+
+@dataclass(slots=True)
+class _PendingCommand:
+    """A command waiting for the one in flight to finish."""
+
+    path: str
+    payload: dict[str, Any]
+    # target states merge into each other, button events replace them
+    mergeable: bool
+    future: asyncio.Future = field(
+        default_factory=lambda: asyncio.get_running_loop().create_future()
+    )
+
+
+class CommandCoalescer:
+    """Keep at most one command per resource in flight.
+
+    Commands that arrive while one is in flight wait in a single pending
+    command: target states are merged into it, newer values replacing older
+    ones key by key and options such as the fade time only kept if the
+    newest target state carries them; any other command replaces it, so the
+    newest one wins either way. Once the command in flight finishes, the
+    pending one is sent, and every caller whose command went into it gets its
+    response.
+    """
+
+    def __init__(self) -> None:
+        """Initialize the coalescer."""
+        self._pending: dict[str, _PendingCommand] = {}
+        self._workers: dict[str, asyncio.Task] = {}
+
+    async def async_send(
+        self,
+        key: str,
+        path: str,
+        payload: dict[str, Any],
+        send: Callable[[str, dict[str, Any]], Awaitable[dict[str, Any]]],
+        merge: bool = True,
+    ) -> dict[str, Any]:
+        """Queue a command for resource key and wait for the one carrying it.
+
+        With merge, payload is a target state to merge into a pending target
+        state for the same path.
+        """
+        pending = self._pending.get(key)
+        if pending is None:
+            pending = _PendingCommand(path, dict(payload), merge)
+            self._pending[key] = pending
+            if key not in self._workers:
+                self._workers[key] = asyncio.get_running_loop().create_task(
+                    self._async_drain(key, send)
+                )
+        elif merge and pending.mergeable and pending.path == path:
+            for option in COMMAND_OPTIONS:
+                pending.payload.pop(option, None)
+            pending.payload.update(payload)
+        else:
+            # an older target would overtake this command, drop it
+            pending.path = path
+            pending.payload = dict(payload)
+            pending.mergeable = merge
+        return await asyncio.shield(pending.future)
+
+    async def _async_drain(
+        self,
+        key: str,
+        send: Callable[[str, dict[str, Any]], Awaitable[dict[str, Any]]],
+    ) -> None:
+        """Send the pending commands for key one after the other."""
+        try:
+            while (pending := self._pending.pop(key, None)) is not None:
+                try:
+                    result = await send(pending.path, pending.payload)
+                except Exception as err:  # handed to the waiting callers
+                    pending.future.set_exception(err)
+                else:
+                    pending.future.set_result(result)
+        finally:
+            del self._workers[key]
+
+
+class FellerApi:
+    """Talk to the gateway REST API over one keep-alive connection pool."""
+
+    def __init__(
+        self,
+        session: aiohttp.ClientSession,
+        host: str,
+        apikey: str,
+        max_concurrent_requests: int,
+        metrics: Metrics | None = None,
+    ) -> None:
+        """Initialize the client."""
+        self._session = session
+        self._base = "http://" + host + "/api"
+        self._headers = {"authorization": "Bearer " + apikey}
+        self._coalescer = CommandCoalescer()
+        self._timeout = aiohttp.ClientTimeout(total=REQUEST_TIMEOUT)
+        self.scheduler = RequestScheduler(max_concurrent_requests)
+        self.breaker = CircuitBreaker(self.async_get_info)
+        self.metrics = metrics if metrics is not None else Metrics()
+
+    async def async_request(
+        self,
+        method: str,
+        path: str,
+        json: dict[str, Any] | None = None,
+        priority: int = PRIORITY_COMMAND,
+    ) -> dict[str, Any]:
+        """Send a request and return the decoded response body.
+
+        Raises GatewayUnavailable without sending anything while the breaker
+        is open.
+        """
+        self.breaker.check()
+        async with self.scheduler.slot(priority):
+            # the breaker may have opened while waiting for the slot
+            self.breaker.check()
+            start = time.perf_counter()
+            try:
+                response = await self._async_send(method, path, json)
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+                self.breaker.record_failure()
+                raise
+            finally:
+                self.metrics.observe_request(
+                    method, path, (time.perf_counter() - start) * 1000
+                )
+        self.breaker.record_success()
+        return response
+
+    async def _async_send(
+        self, method: str, path: str, json: dict[str, Any] | None
+    ) -> dict[str, Any]:
+        async with self._session.request(
+            method,
+            self._base + path,
+            headers=self._headers,
+            json=json,
+            timeout=self._timeout,
+        ) as response:
+            response.raise_for_status()
+            return await response.json(content_type=None)
+
+    async def async_get_info(self) -> dict[str, Any]:
+        """Return the gateway info; cheap, and used as the health probe."""
+        return await self._async_send("GET", "/info", None)
+
+    async def async_get_loads(self) -> dict[str, Any]:
+        """Return all loads."""
+        return await self.async_request("GET", "/loads", priority=PRIORITY_REFRESH)
+
+    async def async_get_load(self, id: int | str) -> dict[str, Any]:
+        """Return a single load."""
+        return await self.async_request(
+            "GET", f"/loads/{id}", priority=PRIORITY_REFRESH
+        )
+
+    async def async_set_target_state(
+        self, id: int | str, target_state: dict[str, Any]
+    ) -> dict[str, Any]:
+        """Set the target state of a load, e.g. {"bri": 10000}.
+
+        Bursts, e.g. from dragging a slider, are coalesced so that only the
+        newest target is sent once the previous command has finished.
+        """
+        return await self._async_put_coalesced(
+            f"/loads/{id}", "/target_state", target_state
+        )
+
+    async def async_ctrl(
+        self, id: int | str, button: str, event: str = "click"
+    ) -> dict[str, Any]:
+        """Emulate a button event on a load.
+
+        Goes through the same queue as the target states of the load, so a
+        target still waiting there cannot overtake the click.
+        """
+        return await self._async_put_coalesced(
+            f"/loads/{id}",
+            "/ctrl",
+            {"button": button, "event": event},
+            merge=False,
+        )
+
+    async def async_get_hvacgroups(self) -> dict[str, Any]:
+        """Return all hvac groups."""
+        return await self.async_request(
+            "GET", "/hvacgroups", priority=PRIORITY_REFRESH
+        )
+
+    async def async_get_hvacgroup(self, id: int | str) -> dict[str, Any]:
+        """Return a single hvac group."""
+        return await self.async_request(
+            "GET", f"/hvacgroups/{id}", priority=PRIORITY_REFRESH
+        )
+
+    async def async_set_hvacgroup_target_state(
+        self, id: int | str, target_state: dict[str, Any]
+    ) -> dict[str, Any]:
+        """Set the target state of an hvac group, coalesced like loads."""
+        return await self._async_put_coalesced(
+            f"/hvacgroups/{id}", "/target_state", target_state
+        )
+
+    async def _async_put_coalesced(
+        self,
+        resource: str,
+        endpoint: str,
+        payload: dict[str, Any],
+        merge: bool = True,
+    ) -> dict[str, Any]:
+        """PUT to an endpoint of a resource through the per-resource queue."""
+        return await self._coalescer.async_send(
+            resource, resource + endpoint, payload, self._async_put, merge
+        )
+
+    async def _async_put(self, path: str, payload: dict[str, Any]) -> dict[str, Any]:
+        return await self.async_request("PUT", path, json=payload)
+
+    async def async_get_scenes(self) -> dict[str, Any]:
+        """Return all scenes."""
+        return await self.async_request("GET", "/scenes", priority=PRIORITY_REFRESH)
+
+    async def async_get_job(self, id: int | str) -> dict[str, Any]:
+        """Return a single job."""
+        return await self.async_request(
+            "GET", f"/jobs/{id}", priority=PRIORITY_REFRESH
+        )
+
+    async def async_trigger_job(self, id: int | str) -> dict[str, Any]:
+        """Trigger a job, e.g. the one behind a scene."""
+        return await self.async_request("GET", f"/jobs/{id}/trigger")
@@ -3,90 +3,81 @@ from __future__ import annotations
 
 import logging
 
-import requests
-import websockets
-import asyncio
-import json
-import socket
-
 from .const import (
     DOMAIN,
 )
+from .entity import gateway_command
+from .state import SceneRecord
 
 # Import the device class from the component that you want to support
 from homeassistant.components.button import (
     ButtonEntity,
 )
+from homeassistant.core import callback
 
 _LOGGER = logging.getLogger(__name__)
 
-def updatedata(host, apikey):
-    return requests.get(
-        f"http://{host}/api/scenes", headers={"authorization": f"Bearer {apikey}"}
-    )
-
-
 async def async_setup_entry(hass, entry, async_add_entities):
-    host = entry.data["host"]
-    apikey = entry.data["apikey"]
-
-    response = await hass.async_add_executor_job(updatedata, host, apikey)
+    hub = hass.data[DOMAIN][entry.entry_id]
+    known = set()
 
-    scene_resp = response.json()
+    @callback
+    def async_add_new_scenes():
+        # also called after the live topology replaced a cached one
+        scenes = []
+        for record in hub.coordinator.state.scenes.values():
+            if record.id not in known:
+                known.add(record.id)
+                scenes.append(FellerScene(record, hub))
+        if scenes:
+            async_add_entities(scenes)
 
-    scenes = []
-    for value in scene_resp["data"]:
-        scenes.append(FellerScene(value, host, apikey))
-
-    # asyncio.get_event_loop().create_task(hello(scenes, hass, host, apikey))
-    async_add_entities(scenes, True)
+    async_add_new_scenes()
+    entry.async_on_unload(hub.coordinator.async_add_listener(async_add_new_scenes))
 
 
 class FellerScene(ButtonEntity):
     """Representation of an Awesome Scene."""
 
-    def __init__(self, data, host, apikey) -> None:
+    def __init__(self, record: SceneRecord, hub) -> None:
         """Initialize an AwesomeScene."""
         # scene { "type": 20, "name": "Alle Storen auf", "sceneButtons": [], "kind": 24, "id": 211, "job": 210 }
 
-        self._data = data
-        self._name = data["name"]
-        self._id = str(data["id"])
-        self._type = data["type"]
-        self._kind = data["kind"]
-        self._job = data["job"]
-        self._host = host
-        self._apikey = apikey
+        # updated in place when the scenes are fetched again
+        self._record = record
+        self._id = str(record.id)
+        self._hub = hub
+        self._api = hub.api
+
+    async def async_added_to_hass(self) -> None:
+        """Follow the availability of the gateway and of the scene."""
+        await super().async_added_to_hass()
+        self.async_on_remove(
+            self._api.breaker.add_listener(self.async_write_ha_state)
+        )
+        # a refresh after a start from the cache may drop or rename the scene
+        self.async_on_remove(
+            self._hub.coordinator.async_add_listener(self.async_write_ha_state)
+        )
+
+    @property
+    def available(self) -> bool:
+        """Return False if the gateway is down or no longer knows this scene."""
+        return (
+            not self._api.breaker.is_open
+            and self._record.id in self._hub.coordinator.state.scenes
+        )
 
     @property
     def name(self) -> str:
         """Return the display name of this scene."""
-        return self._name
+        return self._record.name
 
     @property
     def unique_id(self):
         return "scene-" + self._id
 
-    def press(self) -> None:
+    @gateway_command
+    async def async_press(self) -> None:
         """Handle the button press."""
-        requests.get(
-            f"http://{self._host}/api/jobs/{self._job}/trigger",
-            headers={"authorization": f"Bearer {self._apikey}"},
-        )
-        # _LOGGER.info(response.json())
-
-    def updatestate(self):
-        ip = self._host
-        # _LOGGER.info("requesting http://"+ip+"/api/scenes/"+self._id)
-        return requests.get(
-            f"http://{self._host}/api/jobs/{self._id}",
-            headers={"authorization": f"Bearer {self._apikey}"},
-        )
-
-    def update(self) -> None:
-        """Fetch new state data for this scene.
-        This is the only method that should fetch new data for Home Assistant.
-        """
-        response = self.updatestate()
-        scene = response.json()
-        _LOGGER.info(scene)
\ No newline at end of file
+        await self._api.async_trigger_job(self._record.job)
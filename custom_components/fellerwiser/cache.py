@@ -0,0 +1,39 @@
+"""Persistent cache of the discovered gateway topology."""
+
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.storage import Store
+
+from .const import DOMAIN
+
+STORAGE_VERSION = 1
+
+
+class DiscoveryCache:
+    """Keep the loads, hvac groups and scenes of a gateway in HA storage.
+
+    Only the topology is stored, not the state (see GatewayState.topology),
+    so entities restored from the cache stay unknown until the live state
+    has been fetched.
+    """
+
+    def __init__(self, hass: HomeAssistant, entry_id: str) -> None:
+        """Initialize the cache."""
+        self._store: Store[dict[str, list[dict[str, Any]]]] = Store(
+            hass, STORAGE_VERSION, f"{DOMAIN}.{entry_id}.discovery"
+        )
+
+    async def async_load(self) -> dict[str, list[dict[str, Any]]] | None:
+        """Return the cached topology, or None if nothing was cached yet."""
+        return await self._store.async_load()
+
+    async def async_save(self, topology: dict[str, list[dict[str, Any]]]) -> None:
+        """Replace the cached topology."""
+        await self._store.async_save(topology)
+
+    async def async_remove(self) -> None:
+        """Drop the cache, e.g. when the config entry is removed."""
+        await self._store.async_remove()
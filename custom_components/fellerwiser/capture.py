@@ -0,0 +1,93 @@
+"""Capture of the raw push frames sent by a Feller Wiser µGateway."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import time
+
+try:
+    from orjson import dumps as _dumps
+except ImportError:  # pragma: no cover - orjson ships with Home Assistant
+    from json import dumps as _json_dumps
+
+    def _dumps(obj) -> bytes:
+        return _json_dumps(obj, separators=(",", ":")).encode()
+
+
+_LOGGER = logging.getLogger(__name__)
+
+# rotate the capture at this size, keeping BACKUPS older files
+MAX_BYTES = 10 * 1024 * 1024
+BACKUPS = 3
+
+
+class FrameRecorder:
+    """Append raw frames to a rotating JSONL file, one object per line.
+
+    {"t": 1234.567891, "f": "{\\"load\\":{\\"id\\":7,...}}"}
+
+    t is the time.monotonic() the frame was received at, f the frame as sent
+    by the gateway. Frames are buffered and written in an executor, so
+    recording does not block the event loop. examples/replay.py feeds a
+    capture back through the hub.
+    """
+
+    def __init__(
+        self, path: str, max_bytes: int = MAX_BYTES, backups: int = BACKUPS
+    ) -> None:
+        """Initialize the recorder; nothing is written before the first frame."""
+        self.path = path
+        self._max_bytes = max_bytes
+        self._backups = backups
+        self._buffer: list[bytes] = []
+        self._flush: asyncio.Future | None = None
+
+    def record(self, frame: str | bytes) -> None:
+        """Queue a frame received just now."""
+        if isinstance(frame, bytes):
+            frame = frame.decode(errors="replace")
+        self._buffer.append(_dumps({"t": round(time.monotonic(), 6), "f": frame}))
+        if self._flush is None:
+            self._schedule_flush()
+
+    def close(self) -> None:
+        """Write what is still buffered, e.g. when the config entry unloads."""
+        if self._buffer and self._flush is None:
+            self._schedule_flush()
+
+    def _schedule_flush(self) -> None:
+        lines, self._buffer = self._buffer, []
+        self._flush = asyncio.get_running_loop().run_in_executor(
+            None, self._write, lines
+        )
+        self._flush.add_done_callback(self._flushed)
+
+    def _flushed(self, future: asyncio.Future) -> None:
+        self._flush = None
+        if not future.cancelled() and (err := future.exception()) is not None:
+            # these frames are lost, later ones are still written
+            _LOGGER.warning("Error writing frame capture %s: %s", self.path, err)
+        if self._buffer:
+            # frames that arrived while writing
+            self._schedule_flush()
+
+    def _write(self, lines: list[bytes]) -> None:
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with open(self.path, "ab") as file:
+            file.write(b"\n".join(lines) + b"\n")
+            size = file.tell()
+        if size >= self._max_bytes:
+            self._rotate()
+
+    def _rotate(self) -> None:
+        # capture.jsonl -> capture.jsonl.1 -> ... -> capture.jsonl.<backups>
+        for index in range(self._backups - 1, 0, -1):
+            source = f"{self.path}.{index}"
+            if os.path.exists(source):
+                os.replace(source, f"{self.path}.{index + 1}")
+        if self._backups:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
@@ -4,13 +4,14 @@ from __future__ import annotations
 
 import logging
 
-import requests
-import websockets
-import asyncio
-import json
-import socket
-
 import voluptuous as vol
+from .const import (
+    CONF_TEMPERATURE_DEADBAND,
+    DEFAULT_TEMPERATURE_DEADBAND,
+    DOMAIN,
+)
+from .entity import FellerHvacGroupEntity, gateway_command
+from .state import HvacGroupRecord
 
 # Import the device class from the component that you want to support
 from homeassistant.components.climate import (
@@ -26,122 +27,61 @@ from homeassistant.components.climate import (
 )
 
 from homeassistant.const import ATTR_TEMPERATURE, UnitOfTemperature
+from homeassistant.core import callback
 
 _LOGGER = logging.getLogger(__name__)
 
 
-async def hello(thermostats, hass, host, apikey):
-    ip = host
-
-    while True:
-        # outer loop restarted every time the connection fails
-        _LOGGER.info("Creating new connection...")
-        try:
-            async with websockets.connect(
-                "ws://" + ip + "/api",
-                additional_headers={"authorization": "Bearer " + apikey},
-                ping_timeout=None,
-            ) as ws:
-                while True:
-                    # listener loop
-                    try:
-                        result = await asyncio.wait_for(ws.recv(), timeout=None)
-                    except (
-                        asyncio.TimeoutError,
-                        websockets.exceptions.ConnectionClosed,
-                    ):
-                        try:
-                            pong = await ws.ping()
-                            await asyncio.wait_for(pong, timeout=None)
-                            _LOGGER.info("Ping OK, keeping connection alive...")
-                            continue
-                        except:
-                            _LOGGER.info(
-                                "Ping error - retrying connection in {} sec (Ctrl-C to quit)".format(
-                                    10
-                                )
-                            )
-                            await asyncio.sleep(10)
-                            break
-                    _LOGGER.info("Server said > {}".format(result))
-                    data = json.loads(result)
-                    for l in thermostats:
-                        if l.unique_id == "thermostat-" + str(data["hvacgroup"]["id"]):
-                            _LOGGER.info("found entity to update: %s", l.unique_id)
-                            _LOGGER.info(
-                                "Updating entity %s with %s",
-                                l.unique_id,
-                                data["hvacgroup"]["state"],
-                            )
-                            l.updateExternal(
-                                # {"hvacgroup":{"id":87,"state":{"on":true,"flags":{"remote_controlled":0,"sensor_error":0,"valve_error":0,"noise":0,"output_on":0,"cooling":0},"boost_temperature":0,"heating_cooling_level":0,"unit":"C","ambient_temperature":25.4,"target_temperature":18.5}}}
-                                data["hvacgroup"]["state"]["ambient_temperature"],
-                                data["hvacgroup"]["state"]["target_temperature"],
-                                data["state"]["on"],
-                                data["hvacgroup"]["state"]["flags"]["cooling"],
-                            )
-        except socket.gaierror:
-            _LOGGER.info(
-                "Socket error - retrying connection in {} sec (Ctrl-C to quit)".format(
-                    10
-                )
-            )
-            await asyncio.sleep(10)
-            continue
-        except ConnectionRefusedError:
-            _LOGGER.info(
-                "Nobody seems to listen to this endpoint. Please check the URL."
-            )
-            _LOGGER.info("Retrying connection in {} sec (Ctrl-C to quit)".format(10))
-            await asyncio.sleep(10)
-            continue
-        except KeyError:
-            _LOGGER.info("KeyError")
-            continue
-
-
-def updatedata(host: str, apikey: str) -> dict:
-    """Fetch HVAC group data from the API."""
-    ip = host
-    key = apikey
-    response = requests.get(
-        f"http://{ip}/api/hvacgroups", headers={"authorization": f"Bearer {key}"}
-    )
-    response.raise_for_status()
-    return response.json()
-
-
 async def async_setup_entry(hass, entry, async_add_entities):
-    host = entry.data["host"]
-    apikey = entry.data["apikey"]
-
-    _LOGGER.info("---------------------------------------------- %s %s", host, apikey)
-
-    hvacgroups = await hass.async_add_executor_job(updatedata, host, apikey)
-
-    thermostats = []
-    for value in hvacgroups["data"]:
-        _LOGGER.info("Found thermostat: %s", value["name"])
-        thermostats.append(FellerThermostat(value, host, apikey))
+    hub = hass.data[DOMAIN][entry.entry_id]
+    known = set()
+
+    @callback
+    def async_add_new_thermostats():
+        # also called after the live topology replaced a cached one
+        thermostats = []
+        for record in hub.coordinator.state.hvacgroups.values():
+            if record.id not in known:
+                _LOGGER.debug("Found thermostat: %s", record.name)
+                known.add(record.id)
+                thermostats.append(
+                    FellerThermostat(
+                        record,
+                        hub,
+                        entry.options.get(
+                            CONF_TEMPERATURE_DEADBAND, DEFAULT_TEMPERATURE_DEADBAND
+                        ),
+                    )
+                )
+        if thermostats:
+            async_add_entities(thermostats)
 
-    asyncio.get_event_loop().create_task(hello(thermostats, hass, host, apikey))
-    async_add_entities(thermostats, True)
+    async_add_new_thermostats()
+    entry.async_on_unload(
+        hub.coordinator.async_add_listener(async_add_new_thermostats)
+    )
 
 
-class FellerThermostat(ClimateEntity):
+class FellerThermostat(FellerHvacGroupEntity, ClimateEntity):
     """A thermostat class for Feller."""
 
     _attr_temperature_unit = UnitOfTemperature.CELSIUS
+    _targets = ("target_temperature",)
+
+    def __init__(self, record: HvacGroupRecord, hub, deadband=0.0) -> None:
+        """Initialize the thermostat.
 
-    def __init__(self, data, host, apikey) -> None:
-        """Initialize the thermostat."""
-        self._data = data
-        self._name = data["name"]
-        self._id = str(data["id"])
-        self._host = host
-        self._apikey = apikey
-        self._is_on = True
+        Ambient temperature changes smaller than deadband are not published.
+        """
+        super().__init__(record, hub)
+        self._deadband = deadband
         self._is_cooling = False
+        # the published ambient temperature, which lags the record within
+        # the deadband
+        self._current_temperature = record.ambient_temperature
+        self._published = self._publishedKey()
+        self._target_temperature_high = None
+        self._target_temperature_low = None
         # self._attr_current_temperature = data["name"]
         # self._attr_target_temperature = ATTR_TEMPERATURE
         # self._attr_target_temperature_high = ATTR_TARGET_TEMP_HIGH
@@ -157,7 +97,7 @@ class FellerThermostat(ClimateEntity):
     @property
     def name(self):
         """Return the name of the thermostat."""
-        return self._name
+        return self._record.name
 
     @property
     def turn_on(self):
@@ -204,9 +144,9 @@ class FellerThermostat(ClimateEntity):
     @property
     def is_cooling(self):
         """Return true if the thermostat is cooling."""
-        if self._cooling == 1:
+        if self._record.cooling == 1:
             return True
-        elif self._cooling == 0:
+        elif self._record.cooling == 0:
             return False
         else:
             return False
@@ -219,7 +159,9 @@ class FellerThermostat(ClimateEntity):
     @property
     def target_temperature(self) -> float | None:
         """Return the target temperature."""
-        return self._target_temperature
+        return self._optimistic.get(
+            "target_temperature", self._record.target_temperature
+        )
 
     @property
     def target_temperature_high(self) -> float | None:
@@ -236,46 +178,55 @@ class FellerThermostat(ClimateEntity):
         """Return true if the thermostat is on."""
         return self._is_on
 
+    @property
+    def _is_on(self):
+        # unknown counts as on, like before the first update
+        return self._record.on is not False
+
     def set_hvac_mode(self, hvac_mode: HVACMode) -> None:
         NotImplemented
 
-    def set_temperature(self, **kwargs) -> None:
+    @gateway_command
+    async def async_set_temperature(self, **kwargs) -> None:
         """Set the target temperature."""
-        if kwargs.get(ATTR_TEMPERATURE) is not None:
-            ip = self._host
-        response = requests.put(
-            "http://" + ip + "/api/hvacgroups/" + self._id + "/target_state",
-            headers={"authorization": "Bearer " + self._apikey},
-            json={"target_temperature": kwargs.get(ATTR_TEMPERATURE)},
-        )
-        self._target_temperature = response.json()["data"]["target_state"][
-            "target_temperature"
-        ]
-        _LOGGER.info("Setting target temperature to %s", self._target_temperature)
-
-    def update(self) -> None:
-        response = self.updatestate()
-        hvacgroup = response.json()
-
-        self._current_temperature = hvacgroup["data"]["state"]["ambient_temperature"]
-        self._target_temperature = hvacgroup["data"]["state"]["target_temperature"]
-        # self._target_temperature_high = hvacgroup["data"]["max_temperature"]
-        # self._target_temperature_low = hvacgroup["data"]["min_temperature"]
-        self._is_on = hvacgroup["data"]["state"]["on"]
-        self._cooling = hvacgroup["data"]["state"]["flags"]["cooling"]
-
-    def updatestate(self):
-        ip = self._host
-        # _LOGGER.info("requesting http://"+ip+"/api/loads/"+self._id)
-        return requests.get(
-            "http://" + ip + "/api/hvacgroups/" + self._id,
-            headers={"authorization": "Bearer " + self._apikey},
+        if kwargs.get(ATTR_TEMPERATURE) is None:
+            return
+        response = await self._api.async_set_hvacgroup_target_state(
+            self._id, {"target_temperature": kwargs.get(ATTR_TEMPERATURE)}
         )
-
-    def updateExternal(self, ambient_temperature, target_temperature, state, cooling):
-        """Update the thermostat with external values."""
+        self._handle_command(response["data"]["target_state"])
+        _LOGGER.debug("Setting target temperature to %s", self.target_temperature)
+
+    def _handle_coordinator_update(self) -> None:
+        """Publish the state of this hvac group from the last bulk refresh."""
+        self._optimistic.clear()
+        self._current_temperature = self._record.ambient_temperature
+        self._published = self._publishedKey()
+        super()._handle_coordinator_update()
+
+    def _handle_event(self, record: HvacGroupRecord, changed: bool):
+        """Publish a pushed change unless it is ambient noise in the deadband."""
+        confirmed = bool(self._optimistic)
+        # the gateway reported back, its state replaces the target
+        self._optimistic.clear()
+        ambient_temperature = record.ambient_temperature
+        if (
+            ambient_temperature is not None
+            and self._current_temperature is not None
+            and abs(ambient_temperature - self._current_temperature) < self._deadband
+        ):
+            # sensor noise within the deadband, keep the published value
+            ambient_temperature = self._current_temperature
+        if (
+            not confirmed
+            and ambient_temperature == self._current_temperature
+            and self._published == self._publishedKey()
+        ):
+            return
+        _LOGGER.debug("Updating entity %s with %s", self.unique_id, record)
         self._current_temperature = ambient_temperature
-        self._target_temperature = target_temperature
-        self._is_on = state
-        self._cooling = cooling  # 0 = heating, 1 = cooling ??
-        schedule_update_ha_state()
\ No newline at end of file
+        self._published = self._publishedKey()
+        self.schedule_update_ha_state()
+
+    def _publishedKey(self):
+        return (self.target_temperature, self._record.on, self._record.cooling)
@@ -7,11 +7,27 @@ from typing import Any
 import voluptuous as vol
 
 from homeassistant import config_entries
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.data_entry_flow import FlowResult
 from homeassistant.exceptions import HomeAssistantError
 
-from .const import DOMAIN
+from .const import (
+    CONF_CAPTURE_FRAMES,
+    CONF_FRAME_LOG_INTERVAL,
+    CONF_HEARTBEAT_INTERVAL,
+    CONF_MAX_CONCURRENT_REQUESTS,
+    CONF_PONG_TIMEOUT,
+    CONF_PUBLISH_RATE,
+    CONF_SCENE_OPTIMIZER,
+    DEFAULT_CAPTURE_FRAMES,
+    DEFAULT_FRAME_LOG_INTERVAL,
+    DEFAULT_HEARTBEAT_INTERVAL,
+    DEFAULT_MAX_CONCURRENT_REQUESTS,
+    DEFAULT_PONG_TIMEOUT,
+    DEFAULT_PUBLISH_RATE,
+    DEFAULT_SCENE_OPTIMIZER,
+    DOMAIN,
+)
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -71,6 +87,14 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
 
     VERSION = 1
 
+    @staticmethod
+    @callback
+    def async_get_options_flow(
+        config_entry: config_entries.ConfigEntry,
+    ) -> OptionsFlowHandler:
+        """Create the options flow."""
+        return OptionsFlowHandler()
+
     async def async_step_user(
         self, user_input: dict[str, Any] | None = None
     ) -> FlowResult:
@@ -99,6 +123,67 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
         )
 
 
+class OptionsFlowHandler(config_entries.OptionsFlow):
+    """Handle the options of a Feller Wiser gateway."""
+
+    async def async_step_init(
+        self, user_input: dict[str, Any] | None = None
+    ) -> FlowResult:
+        """Manage the options."""
+        if user_input is not None:
+            return self.async_create_entry(title="", data=user_input)
+
+        options = self.config_entry.options
+        return self.async_show_form(
+            step_id="init",
+            data_schema=vol.Schema(
+                {
+                    vol.Required(
+                        CONF_MAX_CONCURRENT_REQUESTS,
+                        default=options.get(
+                            CONF_MAX_CONCURRENT_REQUESTS,
+                            DEFAULT_MAX_CONCURRENT_REQUESTS,
+                        ),
+                    ): vol.All(vol.Coerce(int), vol.Range(min=1, max=16)),
+                    vol.Required(
+                        CONF_HEARTBEAT_INTERVAL,
+                        default=options.get(
+                            CONF_HEARTBEAT_INTERVAL, DEFAULT_HEARTBEAT_INTERVAL
+                        ),
+                    ): vol.All(vol.Coerce(int), vol.Range(min=5, max=600)),
+                    vol.Required(
+                        CONF_PONG_TIMEOUT,
+                        default=options.get(CONF_PONG_TIMEOUT, DEFAULT_PONG_TIMEOUT),
+                    ): vol.All(vol.Coerce(int), vol.Range(min=1, max=60)),
+                    # no temperature deadband until the climate platform is
+                    # set up with the others
+                    vol.Required(
+                        CONF_PUBLISH_RATE,
+                        default=options.get(CONF_PUBLISH_RATE, DEFAULT_PUBLISH_RATE),
+                    ): vol.All(vol.Coerce(float), vol.Range(min=0, max=20)),
+                    vol.Required(
+                        CONF_SCENE_OPTIMIZER,
+                        default=options.get(
+                            CONF_SCENE_OPTIMIZER, DEFAULT_SCENE_OPTIMIZER
+                        ),
+                    ): bool,
+                    vol.Required(
+                        CONF_CAPTURE_FRAMES,
+                        default=options.get(
+                            CONF_CAPTURE_FRAMES, DEFAULT_CAPTURE_FRAMES
+                        ),
+                    ): bool,
+                    vol.Required(
+                        CONF_FRAME_LOG_INTERVAL,
+                        default=options.get(
+                            CONF_FRAME_LOG_INTERVAL, DEFAULT_FRAME_LOG_INTERVAL
+                        ),
+                    ): vol.All(vol.Coerce(float), vol.Range(min=0, max=3600)),
+                }
+            ),
+        )
+
+
 class CannotConnect(HomeAssistantError):
     """Error to indicate we cannot connect."""
 
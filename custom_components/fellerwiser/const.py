@@ -1,3 +1,26 @@
 """Constants for the Feller Wiser integration."""
 
 DOMAIN = "fellerwiser"
+
+CONF_MAX_CONCURRENT_REQUESTS = "max_concurrent_requests"
+DEFAULT_MAX_CONCURRENT_REQUESTS = 4
+
+CONF_HEARTBEAT_INTERVAL = "heartbeat_interval"
+DEFAULT_HEARTBEAT_INTERVAL = 30
+CONF_PONG_TIMEOUT = "pong_timeout"
+DEFAULT_PONG_TIMEOUT = 10
+
+CONF_TEMPERATURE_DEADBAND = "temperature_deadband"
+DEFAULT_TEMPERATURE_DEADBAND = 0.0
+
+CONF_PUBLISH_RATE = "publish_rate"
+DEFAULT_PUBLISH_RATE = 2.0
+
+CONF_SCENE_OPTIMIZER = "scene_optimizer"
+DEFAULT_SCENE_OPTIMIZER = False
+
+CONF_CAPTURE_FRAMES = "capture_frames"
+DEFAULT_CAPTURE_FRAMES = False
+
+CONF_FRAME_LOG_INTERVAL = "frame_log_interval"
+DEFAULT_FRAME_LOG_INTERVAL = 0.0
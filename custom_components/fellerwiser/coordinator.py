@@ -0,0 +1,67 @@
+"""Bulk state refresh for a Feller Wiser µGateway."""
+
+from __future__ import annotations
+
+import logging
+from typing import Any
+
+import aiohttp
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
+
+from .api import FellerApi
+from .const import DOMAIN
+from .state import GatewayState
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class FellerCoordinator(DataUpdateCoordinator[GatewayState]):
+    """Fetch all loads and hvac groups of a gateway in one pass.
+
+    The data is the GatewayState of the gateway, the same object for the
+    lifetime of the coordinator. State changes arrive by push, so there is no
+    update interval; a refresh only happens when one is requested.
+    """
+
+    def __init__(self, hass: HomeAssistant, api: FellerApi) -> None:
+        """Initialize the coordinator."""
+        super().__init__(hass, _LOGGER, name=DOMAIN, update_interval=None)
+        self.api = api
+        self.state = GatewayState()
+
+    async def async_refresh_scenes(self) -> None:
+        """Fetch the scenes; they only change when the gateway is reconfigured."""
+        scenes = await self.api.async_get_scenes()
+        self.state.set_scenes(scenes["data"])
+
+    @callback
+    def async_set_topology(self, topology: dict[str, list[dict[str, Any]]]) -> None:
+        """Populate the store from a cached topology."""
+        self.state.set_loads(topology["loads"])
+        self.state.set_hvacgroups(topology["hvacgroups"])
+        self.state.set_scenes(topology["scenes"])
+        self.async_set_updated_data(self.state)
+
+    def topology(self) -> dict[str, list[dict[str, Any]]]:
+        """Return the discovered resources in the form the cache stores."""
+        return self.state.topology()
+
+    async def _async_update_data(self) -> GatewayState:
+        """Fetch the bulk resources."""
+        try:
+            loads = await self.api.async_get_loads()
+            try:
+                hvacgroups = await self.api.async_get_hvacgroups()
+            except aiohttp.ClientResponseError as err:
+                # gateways without hvac support do not know the resource
+                if err.status != 404:
+                    raise
+                hvacgroups = {"data": []}
+        except aiohttp.ClientError as err:
+            raise UpdateFailed(f"Error communicating with gateway: {err}") from err
+
+        self.state.set_loads(loads["data"])
+        self.state.set_hvacgroups(hvacgroups["data"])
+        return self.state
@@ -0,0 +1,33 @@
+"""Diagnostics support for Feller Wiser."""
+
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from .const import DOMAIN
+
+TO_REDACT = {"apikey"}
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> dict[str, Any]:
+    """Return diagnostics for a config entry."""
+    hub = hass.data[DOMAIN][entry.entry_id]
+    state = hub.coordinator.state
+    return {
+        "entry": async_redact_data(entry.as_dict(), TO_REDACT),
+        "gateway": {
+            "loads": len(state.loads),
+            "hvacgroups": len(state.hvacgroups),
+            "scenes": len(state.scenes),
+            "breaker_open": hub.api.breaker.is_open,
+            "queued_requests": hub.api.scheduler.queued,
+            "max_concurrent_requests": hub.api.scheduler.limit,
+        },
+        "metrics": hub.metrics.as_dict(),
+    }
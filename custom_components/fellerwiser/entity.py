@@ -0,0 +1,163 @@
+"""Helpers shared by the entities of the Feller Wiser integration."""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Awaitable, Callable
+import functools
+from typing import Any
+
+import aiohttp
+
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers.update_coordinator import CoordinatorEntity
+
+from .events import HvacGroupEvent, LoadEvent
+from .state import HvacGroupRecord, LoadRecord
+from .throttle import StateThrottle
+
+
+def gateway_command(
+    func: Callable[..., Awaitable[None]],
+) -> Callable[..., Awaitable[None]]:
+    """Report a command the gateway did not take as a HomeAssistantError.
+
+    Covers connection errors, timeouts, error responses and the breaker
+    refusing to send, so a service call fails with a message instead of a
+    traceback.
+    """
+
+    @functools.wraps(func)
+    async def wrapper(self, *args, **kwargs) -> None:
+        try:
+            await func(self, *args, **kwargs)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as err:
+            raise HomeAssistantError(
+                f"Feller Wiser gateway {self._hub.host} unavailable: "
+                f"{str(err) or type(err).__name__}"
+            ) from err
+
+    return wrapper
+
+
+class FellerEntity(CoordinatorEntity):
+    """An entity showing one resource of the gateway state store.
+
+    Subclasses set the kind of events it receives and the target state
+    fields a command shows until the gateway confirms them.
+    """
+
+    _kind: str
+    _targets: tuple[str, ...] = ()
+
+    def __init__(self, record: LoadRecord | HvacGroupRecord, hub) -> None:
+        """Initialize the entity."""
+        super().__init__(hub.coordinator)
+        # the state lives in the gateway state store, shared with the hub
+        self._record = record
+        self._id = str(record.id)
+        self._hub = hub
+        self._api = hub.api
+        # targets of commands not confirmed by a push yet; kept out of the
+        # shared record, so the confirming push is not taken for a no-op
+        self._optimistic: dict[str, Any] = {}
+
+    async def async_added_to_hass(self) -> None:
+        """Subscribe to push updates for this resource."""
+        await super().async_added_to_hass()
+        self.async_on_remove(
+            self._hub.register(
+                self._kind,
+                self._record.id,
+                self._handle_event,
+                self._handle_command,
+            )
+        )
+
+    @property
+    def available(self) -> bool:
+        """Return False if the gateway is down or no longer knows this resource."""
+        return (
+            super().available
+            and not self._api.breaker.is_open
+            and self._record.id in self._records
+        )
+
+    @property
+    def _records(self) -> dict[int, Any]:
+        """Return the records of this kind in the state store."""
+        raise NotImplementedError
+
+    def _updateOptimistic(self, response):
+        """Take the target state from a command response as the new state.
+
+        The push event sent once the resource reaches it corrects anything
+        the gateway did differently, so no follow-up GET is needed.
+        """
+        self._handle_command(response.get("data", {}).get("target_state", {}))
+
+    def _handle_command(self, target_state: dict[str, Any]) -> None:
+        """Show the target state of a command until the gateway confirms it."""
+        targets = {
+            key: target_state[key] for key in self._targets if key in target_state
+        }
+        if targets:
+            self._optimistic.update(targets)
+            self.async_write_ha_state()
+
+    def _handle_coordinator_update(self) -> None:
+        """Publish the state of this resource from the last bulk refresh."""
+        self._optimistic.clear()
+        super()._handle_coordinator_update()
+
+    def _handle_event(self, record: LoadRecord | HvacGroupRecord, changed: bool):
+        """Publish a pushed change."""
+        if self._optimistic:
+            # the gateway reported back, its state replaces the targets
+            self._optimistic.clear()
+        elif not changed:
+            # e.g. motor events repeat unchanged values, those are not written
+            return
+        self._publish()
+
+    def _publish(self) -> None:
+        """Write the state of this entity."""
+        self.async_write_ha_state()
+
+
+class FellerLoadEntity(FellerEntity):
+    """An entity showing one load, e.g. a light or a cover."""
+
+    _kind = LoadEvent.kind
+
+    def __init__(self, record: LoadRecord, hub, publish_rate=0) -> None:
+        """Initialize the entity.
+
+        Push events of a fade or motor run are published at most
+        publish_rate times per second, 0 for no limit.
+        """
+        super().__init__(record, hub)
+        self._throttle = StateThrottle(self.async_write_ha_state, publish_rate)
+
+    async def async_added_to_hass(self) -> None:
+        """Subscribe to push updates for this load."""
+        await super().async_added_to_hass()
+        self.async_on_remove(self._throttle.cancel)
+
+    @property
+    def _records(self) -> dict[int, LoadRecord]:
+        return self.coordinator.state.loads
+
+    def _publish(self) -> None:
+        """Write the state of this load, at most at the publish rate."""
+        self._throttle.publish()
+
+
+class FellerHvacGroupEntity(FellerEntity):
+    """An entity showing one hvac group."""
+
+    _kind = HvacGroupEvent.kind
+
+    @property
+    def _records(self) -> dict[int, HvacGroupRecord]:
+        return self.coordinator.state.hvacgroups
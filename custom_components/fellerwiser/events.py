@@ -0,0 +1,92 @@
+"""Decoding of the push frames sent by a Feller Wiser µGateway."""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any, ClassVar
+
+try:
+    from orjson import loads as _loads
+except ImportError:  # pragma: no cover - orjson ships with Home Assistant
+    from json import loads as _loads
+
+
+@dataclass(slots=True, frozen=True)
+class LoadEvent:
+    """State change of a load, e.g.
+
+    {"load":{"id":7,"state":{"bri":0,"flags":{"fading":0, ...}}}}
+    {"load":{"id":3,"state":{"level":10000,"moving":"stop","tilt":0}}}
+    """
+
+    kind: ClassVar[str] = "load"
+
+    id: int
+    bri: int | None
+    level: int | None
+    tilt: int | None
+    moving: str | None
+    fading: int
+
+
+@dataclass(slots=True, frozen=True)
+class HvacGroupEvent:
+    """State change of an hvac group, e.g.
+
+    {"hvacgroup":{"id":87,"state":{"on":true,"flags":{"cooling":0, ...},
+    "ambient_temperature":25.4,"target_temperature":18.5, ...}}}
+    """
+
+    kind: ClassVar[str] = "hvacgroup"
+
+    id: int
+    on: bool | None
+    ambient_temperature: float | None
+    target_temperature: float | None
+    cooling: int | None
+
+
+def decode_frame(frame: str | bytes) -> LoadEvent | HvacGroupEvent | None:
+    """Decode a raw frame into a typed event.
+
+    Returns None for frames of a kind nobody handles and raises ValueError
+    for frames that are not JSON or do not have the expected shape.
+    """
+    data = _loads(frame)
+    if not isinstance(data, dict):
+        raise ValueError("frame is not an object")
+
+    if (load := data.get("load")) is not None:
+        id, state = _id_and_state(load)
+        flags = state.get("flags")
+        return LoadEvent(
+            id,
+            state.get("bri"),
+            state.get("level"),
+            state.get("tilt"),
+            state.get("moving"),
+            flags.get("fading", 0) if isinstance(flags, dict) else 0,
+        )
+
+    if (hvacgroup := data.get("hvacgroup")) is not None:
+        id, state = _id_and_state(hvacgroup)
+        flags = state.get("flags")
+        return HvacGroupEvent(
+            id,
+            state.get("on"),
+            state.get("ambient_temperature"),
+            state.get("target_temperature"),
+            flags.get("cooling") if isinstance(flags, dict) else None,
+        )
+
+    return None
+
+
+def _id_and_state(resource: Any) -> tuple[int, dict[str, Any]]:
+    if not isinstance(resource, dict):
+        raise ValueError("resource is not an object")
+    id = resource.get("id")
+    state = resource.get("state")
+    if not isinstance(id, int) or not isinstance(state, dict):
+        raise ValueError("resource without id or state")
+    return id, state
@@ -0,0 +1,172 @@
+"""End-to-end benchmarks of the integration against simulator.py.
+
+Measures, for gateways of 10, 100 and 1000 loads:
+
+- startup: setting up the config entry, i.e. async_setup_entry and the
+  platforms it forwards to, on a first start and on one from the discovery
+  cache
+- command round trip: target_state PUTs one after the other (p50/p95) and
+  one for every load at once through the request scheduler
+- push throughput: frames per second through the listener of the entry,
+  entity updates included
+
+Run it from a Home Assistant development environment with the test
+requirements installed, since it sets the entry up in a test instance:
+
+    python benchmark.py --sizes 10 100 1000 --latency 0.005
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+from pathlib import Path
+import statistics
+import sys
+import tempfile
+import time
+
+import aiohttp
+
+import simulator
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[3]))
+
+from pytest_homeassistant_custom_component.common import (  # noqa: E402
+    MockConfigEntry,
+    async_test_home_assistant,
+)
+
+from homeassistant import loader  # noqa: E402
+from homeassistant.core import HomeAssistant  # noqa: E402
+
+from custom_components.fellerwiser.api import FellerApi  # noqa: E402
+from custom_components.fellerwiser.const import DOMAIN  # noqa: E402
+from custom_components.fellerwiser.hub import FellerHub  # noqa: E402
+from custom_components.fellerwiser.state import GatewayState  # noqa: E402
+
+# sequential commands timed per size
+ROUND_TRIPS = 100
+# frames pushed per load, at least PUSH_MIN
+PUSH_PER_LOAD = 10
+PUSH_MIN = 1000
+# seconds to wait for the listener to connect or the frames to arrive
+SETTLE_TIMEOUT = 60
+
+
+async def bench_startup(hass: HomeAssistant, entry: MockConfigEntry) -> float:
+    """Return the seconds to set the config entry up."""
+    start = time.perf_counter()
+    if not await hass.config_entries.async_setup(entry.entry_id):
+        raise RuntimeError("Setting up the config entry failed")
+    return time.perf_counter() - start
+
+
+async def bench_round_trip(api: FellerApi, state: GatewayState) -> list[float]:
+    """Return the round trip of sequential commands, in seconds."""
+    ids = list(state.loads)
+    samples = []
+    for i in range(ROUND_TRIPS):
+        id = ids[i % len(ids)]
+        start = time.perf_counter()
+        await api.async_set_target_state(id, {"bri": i * 100})
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+async def bench_burst(api: FellerApi, state: GatewayState) -> float:
+    """Return the seconds to send one command to every load at once."""
+    start = time.perf_counter()
+    await asyncio.gather(
+        *(api.async_set_target_state(id, {"bri": 10000}) for id in state.loads)
+    )
+    return time.perf_counter() - start
+
+
+async def bench_push(
+    session: aiohttp.ClientSession, host: str, hub: FellerHub, count: int
+) -> float:
+    """Return the frames per second the listener of the entry handles."""
+    headers = {"authorization": "Bearer " + simulator.APIKEY}
+    target = hub.metrics.frames_received + count
+    start = time.perf_counter()
+    async with session.post(
+        f"http://{host}/sim/storm", params={"count": count}, headers=headers
+    ) as response:
+        response.raise_for_status()
+    await _settle(lambda: hub.metrics.frames_received >= target)
+    return count / (time.perf_counter() - start)
+
+
+async def bench(size: int, latency: float) -> dict[str, float]:
+    """Run all benchmarks against a simulated gateway of size loads."""
+    gateway = simulator.Gateway(loads=size, latency=latency)
+    runner, host = await simulator.start(gateway)
+    try:
+        with tempfile.TemporaryDirectory() as config_dir:
+            async with async_test_home_assistant(
+                storage_dir=config_dir
+            ) as hass, aiohttp.ClientSession() as session:
+                # load the integration from custom_components
+                hass.data.pop(loader.DATA_CUSTOM_COMPONENTS)
+                entry = MockConfigEntry(
+                    domain=DOMAIN, data={"host": host, "apikey": simulator.APIKEY}
+                )
+                entry.add_to_hass(hass)
+
+                startup = await bench_startup(hass, entry)
+                await hass.config_entries.async_unload(entry.entry_id)
+                cached_startup = await bench_startup(hass, entry)
+                # let the background reconcile and the listener finish starting
+                await _settle(lambda: gateway.open_connections == 1)
+                await hass.async_block_till_done()
+
+                hub = hass.data[DOMAIN][entry.entry_id]
+                state = hub.coordinator.state
+                round_trips = await bench_round_trip(hub.api, state)
+                burst = await bench_burst(hub.api, state)
+                push = await bench_push(
+                    session, host, hub, max(PUSH_MIN, size * PUSH_PER_LOAD)
+                )
+                await hass.config_entries.async_unload(entry.entry_id)
+                await hass.async_stop(force=True)
+    finally:
+        await runner.cleanup()
+
+    quantiles = statistics.quantiles(round_trips, n=20)
+    return {
+        "startup ms": startup * 1000,
+        "cached ms": cached_startup * 1000,
+        "rtt p50 ms": statistics.median(round_trips) * 1000,
+        "rtt p95 ms": quantiles[18] * 1000,
+        "burst ms": burst * 1000,
+        "push frames/s": push,
+    }
+
+
+async def main(sizes: list[int], latency: float) -> None:
+    results = {size: await bench(size, latency) for size in sizes}
+    columns = list(next(iter(results.values())))
+    print(f"{'loads':>6}" + "".join(f"{column:>16}" for column in columns))
+    for size, result in results.items():
+        print(
+            f"{size:>6}"
+            + "".join(f"{result[column]:>16.1f}" for column in columns)
+        )
+
+
+async def _settle(condition) -> None:
+    """Wait until condition holds."""
+    async with asyncio.timeout(SETTLE_TIMEOUT):
+        while not condition():
+            await asyncio.sleep(0.01)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument(
+        "--latency", type=float, default=0.0, help="simulated seconds per request"
+    )
+    args = parser.parse_args()
+    asyncio.run(main(args.sizes, args.latency))
@@ -0,0 +1,127 @@
+"""Replay a frame capture through the hub's dispatcher.
+
+Captures are written by the integration when "Capture raw push frames" is
+enabled in its options, to <config>/fellerwiser/capture-<entry id>.jsonl
+plus rotated .1, .2, ... files. Replay them in real time (1x) or as fast as
+possible to profile the dispatcher offline and compare versions:
+
+    python replay.py capture-<entry id>.jsonl --fast
+    python -m cProfile -s cumtime replay.py capture-<entry id>.jsonl --fast
+
+Run it from a Home Assistant development environment, since the integration
+modules import homeassistant.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+from pathlib import Path
+import sys
+import time
+from types import SimpleNamespace
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[3]))
+
+from custom_components.fellerwiser.api import FellerApi  # noqa: E402
+from custom_components.fellerwiser.events import (  # noqa: E402
+    HvacGroupEvent,
+    LoadEvent,
+    decode_frame,
+)
+from custom_components.fellerwiser.hub import FellerHub  # noqa: E402
+from custom_components.fellerwiser.state import (  # noqa: E402
+    GatewayState,
+    HvacGroupRecord,
+    LoadRecord,
+)
+
+
+def read_capture(path: str) -> list[tuple[float, str]]:
+    """Return the (monotonic time, frame) pairs of a capture, oldest first."""
+    files = [path]
+    index = 1
+    while os.path.exists(f"{path}.{index}"):
+        files.insert(0, f"{path}.{index}")
+        index += 1
+    frames = []
+    for file in files:
+        with open(file, encoding="utf-8") as lines:
+            for line in lines:
+                if line.strip():
+                    entry = json.loads(line)
+                    frames.append((entry["t"], entry["f"]))
+    return frames
+
+
+def seed(state: GatewayState, frames: list[tuple[float, str]]) -> None:
+    """Create a record for every resource in the capture, as discovery would."""
+    for _, frame in frames:
+        try:
+            event = decode_frame(frame)
+        except ValueError:
+            continue
+        if isinstance(event, LoadEvent):
+            state.loads.setdefault(
+                event.id, LoadRecord(event.id, str(event.id), "dim")
+            )
+        elif event is not None:
+            state.hvacgroups.setdefault(
+                event.id, HvacGroupRecord(event.id, str(event.id))
+            )
+
+
+async def replay(frames: list[tuple[float, str]], fast: bool) -> None:
+    """Feed frames through FellerHub.handle_frame and print the throughput."""
+    state = GatewayState()
+    seed(state, frames)
+    # the hub only needs the state store of its coordinator
+    # nothing is sent, the client only carries the metrics
+    api = FellerApi(None, "replay", "", 1)
+    hub = FellerHub("replay", "", api, SimpleNamespace(state=state), 30, 10)
+    dispatched = 0
+
+    def count(record, changed: bool) -> None:
+        nonlocal dispatched
+        dispatched += changed
+
+    for record in state.loads.values():
+        hub.register(LoadEvent.kind, record.id, count)
+    for record in state.hvacgroups.values():
+        hub.register(HvacGroupEvent.kind, record.id, count)
+
+    start = time.perf_counter()
+    first = frames[0][0] if frames else 0.0
+    for received, frame in frames:
+        if not fast:
+            delay = (received - first) - (time.perf_counter() - start)
+            if delay > 0:
+                await asyncio.sleep(delay)
+        hub.handle_frame(frame)
+    elapsed = time.perf_counter() - start
+
+    print(f"frames:      {len(frames)}")
+    print(f"dispatched:  {dispatched} (state changed)")
+    print(f"unknown:     {hub.metrics.unknown_frames}")
+    print(f"malformed:   {hub.metrics.malformed_frames}")
+    print(f"elapsed:     {elapsed:.3f} s")
+    if elapsed:
+        print(f"throughput:  {len(frames) / elapsed:.0f} frames/s")
+    dispatch = hub.metrics.dispatch
+    if dispatch.count:
+        print(
+            f"dispatch:    mean {dispatch.mean:.4f} ms, "
+            f"p95 <= {dispatch.quantile(0.95)} ms"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("capture", help="path of the newest capture file")
+    parser.add_argument(
+        "--fast", action="store_true", help="replay as fast as possible, not 1x"
+    )
+    args = parser.parse_args()
+    asyncio.run(replay(read_capture(args.capture), args.fast))
@@ -0,0 +1,286 @@
+"""Offline stand-in for a Feller Wiser µGateway.
+
+Serves the parts of the REST API and the /api WebSocket the integration
+uses, for any number of loads and with a configurable latency:
+
+    python simulator.py --loads 100 --latency 0.02 --port 8080
+
+then point the integration (or benchmark.py) at 127.0.0.1:8080 with the API
+key "simulator". Every request and WebSocket connection is counted per
+endpoint, see Gateway.requests and Gateway.connections.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+from collections import Counter
+import json
+
+from aiohttp import WSMsgType, web
+
+APIKEY = "simulator"
+
+# types handed out round robin: two dimmers and a switch per blind
+LOAD_TYPES = ("dim", "dali", "onoff", "motor")
+
+
+class Gateway:
+    """The state of the simulated gateway and the app serving it."""
+
+    def __init__(
+        self, loads: int = 10, hvacgroups: int = 2, latency: float = 0.0
+    ) -> None:
+        self.latency = latency
+        self.loads = {}
+        for id in range(1, loads + 1):
+            type = LOAD_TYPES[id % len(LOAD_TYPES)]
+            if type == "motor":
+                state = {"level": 0, "tilt": 0, "moving": "stop"}
+            else:
+                state = {"bri": 0, "flags": {"fading": 0}}
+            self.loads[id] = {
+                "id": id,
+                "name": f"{type} {id}",
+                "type": type,
+                "device": f"{id:08x}",
+                "channel": 0,
+                "state": state,
+            }
+        self.hvacgroups = {
+            id: {
+                "id": id,
+                "name": f"room {id}",
+                "state": {
+                    "on": True,
+                    "ambient_temperature": 21.0,
+                    "target_temperature": 21.5,
+                    "flags": {"cooling": 0},
+                },
+            }
+            for id in range(1001, 1001 + hvacgroups)
+        }
+        # one scene opening and one closing all blinds
+        motors = [id for id, load in self.loads.items() if load["type"] == "motor"]
+        self.jobs = {
+            210: {
+                "id": 210,
+                "target_states": [{"load": id, "level": 0, "tilt": 0} for id in motors],
+            },
+            212: {
+                "id": 212,
+                "target_states": [
+                    {"load": id, "level": 10000, "tilt": 9} for id in motors
+                ],
+            },
+        }
+        self.scenes = [
+            {"id": 211, "name": "Alle Storen auf", "type": 20, "kind": 24, "job": 210},
+            {"id": 213, "name": "Alle Storen zu", "type": 20, "kind": 24, "job": 212},
+        ]
+        self.requests: Counter[str] = Counter()
+        self.connections = 0
+        # host:port once served by start()
+        self.host: str | None = None
+        self._clients: set[web.WebSocketResponse] = set()
+
+    def app(self) -> web.Application:
+        """Return the aiohttp app serving this gateway."""
+        app = web.Application(middlewares=[self._middleware])
+        app.add_routes(
+            [
+                web.get("/api", self._websocket),
+                web.get("/api/info", self._info),
+                web.get("/api/loads", self._get_loads),
+                web.get("/api/loads/{id}", self._get_load),
+                web.put("/api/loads/{id}/target_state", self._set_load),
+                web.put("/api/loads/{id}/ctrl", self._ctrl_load),
+                web.get("/api/hvacgroups", self._get_hvacgroups),
+                web.get("/api/hvacgroups/{id}", self._get_hvacgroup),
+                web.put("/api/hvacgroups/{id}/target_state", self._set_hvacgroup),
+                web.get("/api/scenes", self._get_scenes),
+                web.get("/api/jobs/{id}", self._get_job),
+                web.get("/api/jobs/{id}/trigger", self._trigger_job),
+                # not part of the gateway API, drives push benchmarks
+                web.post("/sim/storm", self._storm),
+            ]
+        )
+        return app
+
+    @property
+    def open_connections(self) -> int:
+        """Return the number of WebSocket connections currently open."""
+        return len(self._clients)
+
+    async def push(self, frame: dict) -> None:
+        """Send a frame to every connected WebSocket client."""
+        data = json.dumps(frame)
+        for ws in list(self._clients):
+            if not ws.closed:
+                await ws.send_str(data)
+
+    async def drop(self) -> None:
+        """Close every WebSocket connection, as a gateway reboot would."""
+        for ws in list(self._clients):
+            await ws.close()
+
+    def reset_counters(self) -> None:
+        """Forget the requests and connections counted so far."""
+        self.requests.clear()
+        self.connections = 0
+
+    @web.middleware
+    async def _middleware(self, request: web.Request, handler):
+        if request.headers.get("authorization") != "Bearer " + APIKEY:
+            return web.json_response(
+                {"status": "error", "message": "unauthorized"}, status=401
+            )
+        if request.path == "/api":
+            # counted in connections
+            return await handler(request)
+        route = request.match_info.route.resource
+        self.requests[
+            f"{request.method} {route.canonical if route else request.path}"
+        ] += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return await handler(request)
+
+    async def _websocket(self, request: web.Request) -> web.WebSocketResponse:
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        self.connections += 1
+        self._clients.add(ws)
+        try:
+            async for msg in ws:
+                if msg.type == WSMsgType.ERROR:
+                    break
+        finally:
+            self._clients.discard(ws)
+        return ws
+
+    async def _info(self, request: web.Request) -> web.Response:
+        return _ok({"product": "simulator", "api": "v1", "sw": "0.0.0"})
+
+    async def _get_loads(self, request: web.Request) -> web.Response:
+        return _ok(list(self.loads.values()))
+
+    async def _get_load(self, request: web.Request) -> web.Response:
+        return _ok(self._load(request))
+
+    async def _set_load(self, request: web.Request) -> web.Response:
+        load = self._load(request)
+        target_state = await request.json()
+        await self._apply_load(load, target_state)
+        return _ok({"id": load["id"], "target_state": target_state})
+
+    async def _ctrl_load(self, request: web.Request) -> web.Response:
+        load = self._load(request)
+        ctrl = await request.json()
+        target_state = {
+            "on": {"bri": 10000},
+            "off": {"bri": 0},
+            "toggle": {"bri": 0 if load["state"].get("bri") else 10000},
+            "up": {"level": 0},
+            "down": {"level": 10000},
+            "stop": {},
+        }.get(ctrl.get("button"), {})
+        await self._apply_load(load, target_state)
+        return _ok({"id": load["id"], "ctrl": ctrl})
+
+    async def _get_hvacgroups(self, request: web.Request) -> web.Response:
+        return _ok(list(self.hvacgroups.values()))
+
+    async def _get_hvacgroup(self, request: web.Request) -> web.Response:
+        return _ok(self._hvacgroup(request))
+
+    async def _set_hvacgroup(self, request: web.Request) -> web.Response:
+        group = self._hvacgroup(request)
+        target_state = await request.json()
+        group["state"].update(target_state)
+        await self.push({"hvacgroup": {"id": group["id"], "state": group["state"]}})
+        return _ok({"id": group["id"], "target_state": target_state})
+
+    async def _get_scenes(self, request: web.Request) -> web.Response:
+        return _ok(self.scenes)
+
+    async def _get_job(self, request: web.Request) -> web.Response:
+        return _ok(self._job(request))
+
+    async def _trigger_job(self, request: web.Request) -> web.Response:
+        job = self._job(request)
+        for target_state in job["target_states"]:
+            target_state = dict(target_state)
+            await self._apply_load(self.loads[target_state.pop("load")], target_state)
+        return _ok({"id": job["id"]})
+
+    async def _storm(self, request: web.Request) -> web.Response:
+        """Push count state changes, cycling through all loads."""
+        count = int(request.query.get("count", 1000))
+        loads = list(self.loads.values())
+        for i in range(count):
+            load = loads[i % len(loads)]
+            if load["type"] == "motor":
+                target_state = {"level": i % 10001, "moving": "down"}
+            else:
+                target_state = {"bri": i % 10001}
+            await self._apply_load(load, target_state)
+        return _ok({"count": count})
+
+    async def _apply_load(self, load: dict, target_state: dict) -> None:
+        state = load["state"]
+        for key in ("bri", "level", "tilt", "moving"):
+            if key in target_state:
+                state[key] = target_state[key]
+        await self.push({"load": {"id": load["id"], "state": state}})
+
+    def _load(self, request: web.Request) -> dict:
+        return self._lookup(self.loads, request)
+
+    def _hvacgroup(self, request: web.Request) -> dict:
+        return self._lookup(self.hvacgroups, request)
+
+    def _job(self, request: web.Request) -> dict:
+        return self._lookup(self.jobs, request)
+
+    @staticmethod
+    def _lookup(resources: dict, request: web.Request) -> dict:
+        try:
+            return resources[int(request.match_info["id"])]
+        except (KeyError, ValueError):
+            raise web.HTTPNotFound() from None
+
+
+def _ok(data) -> web.Response:
+    return web.json_response({"status": "success", "data": data})
+
+
+async def start(
+    gateway: Gateway, host: str = "127.0.0.1", port: int = 0
+) -> tuple[web.AppRunner, str]:
+    """Serve gateway in the running loop, return the runner and host:port."""
+    runner = web.AppRunner(gateway.app())
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    host, port = runner.addresses[0][:2]
+    gateway.host = f"{host}:{port}"
+    return runner, gateway.host
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--loads", type=int, default=10)
+    parser.add_argument("--hvacgroups", type=int, default=2)
+    parser.add_argument(
+        "--latency", type=float, default=0.0, help="seconds per request"
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    args = parser.parse_args()
+
+    gateway = Gateway(args.loads, args.hvacgroups, args.latency)
+    web.run_app(gateway.app(), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
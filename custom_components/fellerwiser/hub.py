@@ -0,0 +1,287 @@
+"""WebSocket connection manager for a Feller Wiser µGateway."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import random
+import socket
+import time
+from collections.abc import Callable
+from typing import Any
+
+import websockets
+
+from .api import FellerApi
+from .capture import FrameRecorder
+from .coordinator import FellerCoordinator
+from .events import HvacGroupEvent, LoadEvent, decode_frame
+from .scenes import SceneIndex
+
+_LOGGER = logging.getLogger(__name__)
+
+# reconnect delays in seconds, drawn uniformly from [0, initial * 2**attempt]
+BACKOFF_INITIAL = 1
+BACKOFF_MAX = 300
+# a connection that stayed up this long resets the backoff
+BACKOFF_RESET = 60
+
+
+class _RedactApikey(logging.LoggerAdapter):
+    """Mask the API key in what the websockets library logs.
+
+    Its debug output includes the handshake headers, and with them the
+    bearer token.
+    """
+
+    def __init__(self, logger: logging.Logger, apikey: str) -> None:
+        super().__init__(logger, {})
+        self._apikey = apikey
+
+    def log(self, level, msg, *args, **kwargs) -> None:
+        if self.isEnabledFor(level):
+            message = msg % args if args else str(msg)
+            if self._apikey:
+                message = message.replace(self._apikey, "**REDACTED**")
+            self.logger.log(level, "%s", message, **kwargs)
+
+
+class FellerHub:
+    """Share one WebSocket connection to a gateway between all platforms.
+
+    Every frame is received and decoded once and then handed to the entity
+    registered for its resource kind and id.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        apikey: str,
+        api: FellerApi,
+        coordinator: FellerCoordinator,
+        heartbeat_interval: float,
+        pong_timeout: float,
+        frame_log_interval: float = 0,
+    ) -> None:
+        """Initialize the hub.
+
+        After heartbeat_interval seconds without a frame the gateway is
+        pinged; without a pong within pong_timeout seconds the connection is
+        considered dead and re-established. With a frame_log_interval, at
+        most one received frame per that many seconds is logged at debug
+        level.
+        """
+        self.host = host
+        self.apikey = apikey
+        self.api = api
+        self.coordinator = coordinator
+        self._heartbeat_interval = heartbeat_interval
+        self._pong_timeout = pong_timeout
+        self._frame_log_interval = frame_log_interval
+        self._next_frame_log = 0.0
+        self._skipped_frames = 0
+        self._ws_logger = _RedactApikey(_LOGGER.getChild("websocket"), apikey)
+        self._callbacks: dict[
+            tuple[str, int], tuple[Callable, Callable | None]
+        ] = {}
+        self._resync_task: asyncio.Task | None = None
+        self.metrics = api.metrics
+        # set when bulk commands may be sent as scene jobs
+        self.scene_index: SceneIndex | None = None
+        # set when raw frames are captured for replay
+        self.recorder: FrameRecorder | None = None
+
+    def register(
+        self,
+        kind: str,
+        id: int,
+        callback: Callable,
+        on_command: Callable | None = None,
+    ) -> Callable[[], None]:
+        """Register the callbacks for one resource and return a remover.
+
+        kind is the kind of the events it receives, LoadEvent.kind or
+        HvacGroupEvent.kind. callback is called with the record and whether
+        its state changed for every push about the resource, on_command with
+        the target state of a command sent by someone other than the entity.
+        """
+        key = (kind, id)
+        callbacks = (callback, on_command)
+        self._callbacks[key] = callbacks
+
+        def unregister() -> None:
+            if self._callbacks.get(key) is callbacks:
+                del self._callbacks[key]
+
+        return unregister
+
+    def dispatch(self, event: LoadEvent | HvacGroupEvent) -> None:
+        """Apply a decoded event to the state store and notify its entity.
+
+        Unchanged state is passed on too: an entity showing the target of a
+        command waits for the push confirming it, which matches the record.
+        An entity that fails on the event is logged and counted with the
+        malformed frames.
+        """
+        record, changed = self.coordinator.state.apply(event)
+        if record is None:
+            return
+        callbacks = self._callbacks.get((event.kind, event.id))
+        if callbacks is None:
+            return
+        try:
+            callbacks[0](record, changed)
+        except Exception:  # a broken entity must not stop the listener
+            self.metrics.malformed_frames += 1
+            _LOGGER.exception("Error handling %s", event)
+
+    def notify(self, kind: str, id: int, target_state: dict[str, Any]) -> None:
+        """Tell the entity of a resource about a command sent on its behalf."""
+        callbacks = self._callbacks.get((kind, id))
+        if callbacks is not None and callbacks[1] is not None:
+            callbacks[1](target_state)
+
+    def handle_frame(self, frame: str | bytes) -> None:
+        """Decode a raw frame and dispatch it.
+
+        Frames of an unknown kind are counted and ignored, malformed ones and
+        those an entity fails on are counted and dropped; none of them closes
+        the connection.
+        """
+        metrics = self.metrics
+        metrics.frames_received += 1
+        start = time.perf_counter()
+        try:
+            event = decode_frame(frame)
+        except ValueError:
+            metrics.malformed_frames += 1
+            _LOGGER.debug("Ignoring malformed frame: %s", frame)
+            return
+        if event is None:
+            metrics.unknown_frames += 1
+            _LOGGER.debug("Ignoring frame of unknown kind: %s", frame)
+            return
+        self.dispatch(event)
+        metrics.dispatch.observe((time.perf_counter() - start) * 1000)
+
+    async def hello(self) -> None:
+        """Keep a WebSocket connection open and dispatch incoming frames.
+
+        Lost connections are retried with exponential backoff and full
+        jitter, and every reconnect triggers a bulk refresh so that state
+        changes missed in between are picked up. So does the first connect
+        while the last bulk refresh failed.
+        """
+        attempt = 0
+        connected_before = False
+        # only the first failure of an outage is logged at info, the retries
+        # at debug
+        outage_logged = False
+
+        while True:
+            # outer loop restarted every time the connection fails
+            _LOGGER.debug("Creating new connection")
+            connected_at = None
+            try:
+                async with websockets.connect(
+                    "ws://" + self.host + "/api",
+                    additional_headers={"authorization": "Bearer " + self.apikey},
+                    ping_timeout=None,
+                    logger=self._ws_logger,
+                ) as ws:
+                    connected_at = time.monotonic()
+                    if outage_logged:
+                        _LOGGER.info("Connection to %s restored", self.host)
+                        outage_logged = False
+                    if connected_before:
+                        self.metrics.reconnects += 1
+                    # also on the first connect if the gateway was down at
+                    # startup: pushes do not make a failed refresh succeed
+                    if connected_before or not self.coordinator.last_update_success:
+                        self._resync()
+                    connected_before = True
+                    while True:
+                        # listener loop
+                        try:
+                            result = await asyncio.wait_for(
+                                ws.recv(), timeout=self._heartbeat_interval
+                            )
+                        except asyncio.TimeoutError:
+                            # idle: make sure the connection is not half-open
+                            pong = await ws.ping()
+                            try:
+                                await asyncio.wait_for(pong, self._pong_timeout)
+                            except asyncio.TimeoutError:
+                                _LOGGER.debug(
+                                    "No pong within %s sec", self._pong_timeout
+                                )
+                                raise
+                            continue
+                        if self._frame_log_interval:
+                            self._log_frame(result)
+                        if self.recorder is not None:
+                            self.recorder.record(result)
+                        self.handle_frame(result)
+            except socket.gaierror as err:
+                failure = ("Socket error: %s", err)
+            except ConnectionRefusedError:
+                failure = (
+                    "Nobody seems to listen to this endpoint. Please check the URL.",
+                )
+            except (
+                OSError,
+                asyncio.TimeoutError,
+                websockets.exceptions.WebSocketException,
+            ) as err:
+                failure = ("Connection lost: %s", err)
+            _LOGGER.log(logging.DEBUG if outage_logged else logging.INFO, *failure)
+            outage_logged = True
+
+            if (
+                connected_at is not None
+                and time.monotonic() - connected_at > BACKOFF_RESET
+            ):
+                # the connection was healthy, start over with a fast retry
+                attempt = 0
+            delay = random.uniform(0, min(BACKOFF_MAX, BACKOFF_INITIAL * 2**attempt))
+            attempt += 1
+            _LOGGER.debug("Retrying connection in %.1f sec", delay)
+            await asyncio.sleep(delay)
+
+    def _log_frame(self, frame: str | bytes) -> None:
+        """Log a frame unless one was logged less than the interval ago."""
+        now = time.monotonic()
+        if now < self._next_frame_log:
+            self._skipped_frames += 1
+            return
+        self._next_frame_log = now + self._frame_log_interval
+        _LOGGER.debug(
+            "Server said (%s frames skipped) > %s", self._skipped_frames, frame
+        )
+        self._skipped_frames = 0
+
+    def stop(self) -> None:
+        """Cancel the work the hub started on its own.
+
+        The listener task itself belongs to the config entry, which cancels
+        it on unload.
+        """
+        if self._resync_task is not None:
+            self._resync_task.cancel()
+            self._resync_task = None
+
+    def resync_if_failed(self) -> None:
+        """Retry a failed bulk refresh once the gateway answers again.
+
+        Called whenever the breaker opens or closes.
+        """
+        if not self.api.breaker.is_open and not self.coordinator.last_update_success:
+            self._resync()
+
+    def _resync(self) -> None:
+        """Fetch the state missed while disconnected, in bulk."""
+        if self._resync_task is not None and not self._resync_task.done():
+            return
+        self._resync_task = asyncio.get_running_loop().create_task(
+            self.coordinator.async_request_refresh()
+        )
@@ -3,146 +3,73 @@
 from __future__ import annotations
 
 import logging
-
-import requests
-import websockets
-import asyncio
-import json
-import socket
+from typing import Any
 
 import voluptuous as vol
+from .api import FADE_TIME
 from .const import (
+    CONF_PUBLISH_RATE,
+    DEFAULT_PUBLISH_RATE,
     DOMAIN,
 )
+from .entity import FellerLoadEntity, gateway_command
+from .state import LoadRecord
 
 # Import the device class from the component that you want to support
 from homeassistant.components.light import (
     ATTR_BRIGHTNESS,
+    ATTR_TRANSITION,
     LightEntity,
+    LightEntityFeature,
 )
+from homeassistant.core import callback
 
 _LOGGER = logging.getLogger(__name__)
 
 
-async def hello(lights, hass, host, apikey):
-    ip = host
-
-    while True:
-        # outer loop restarted every time the connection fails
-        _LOGGER.info("Creating new connection...")
-        try:
-            async with websockets.connect(
-                "ws://" + ip + "/api",
-                additional_headers={"authorization": "Bearer " + apikey},
-                ping_timeout=None,
-            ) as ws:
-                while True:
-                    # listener loop
-                    try:
-                        result = await asyncio.wait_for(ws.recv(), timeout=None)
-                    except (
-                        asyncio.TimeoutError,
-                        websockets.exceptions.ConnectionClosed,
-                    ):
-                        try:
-                            pong = await ws.ping()
-                            await asyncio.wait_for(pong, timeout=None)
-                            _LOGGER.info("Ping OK, keeping connection alive...")
-                            continue
-                        except:
-                            _LOGGER.info(
-                                "Ping error - retrying connection in {} sec (Ctrl-C to quit)".format(
-                                    10
-                                )
-                            )
-                            await asyncio.sleep(10)
-                            break
-                    _LOGGER.info("Server said > {}".format(result))
-                    data = json.loads(result)
-                    doUpdate = False
-
-                    # dim/dali
-                    if "flags" in data["load"]["state"]:
-                        if "fading" in data["load"]["state"]["flags"]:
-                            if data["load"]["state"]["flags"]["fading"] == 0:
-                                doUpdate = True
-                        else:
-                            doUpdate = True
-                    # onoff
-                    else:
-                        doUpdate = True
-                    if doUpdate:
-                        for l in lights:
-                            if l.unique_id == "light-" + str(data["load"]["id"]):
-                                _LOGGER.info("found entity to update")
-                                l.updateExternal(data["load"]["state"]["bri"])
-        except socket.gaierror:
-            _LOGGER.info(
-                "Socket error - retrying connection in {} sec (Ctrl-C to quit)".format(
-                    10
-                )
-            )
-            await asyncio.sleep(10)
-            continue
-        except ConnectionRefusedError:
-            _LOGGER.info(
-                "Nobody seems to listen to this endpoint. Please check the URL."
-            )
-            _LOGGER.info("Retrying connection in {} sec (Ctrl-C to quit)".format(10))
-            await asyncio.sleep(10)
-            continue
-        except KeyError:
-            _LOGGER.info("KeyError")
-            continue
-
-
-def updatedata(host, apikey):
-    # ip = "192.168.0.18"
-    ip = host
-    key = apikey
-    return requests.get(
-        "http://" + ip + "/api/loads", headers={"authorization": "Bearer " + key}
-    )
-
 async def async_setup_entry(hass, entry, async_add_entities):
-    host = entry.data["host"]
-    apikey = entry.data["apikey"]
-
-    _LOGGER.info("---------------------------------------------- %s %s", host, apikey)
-
-    response = await hass.async_add_executor_job(updatedata, host, apikey)
-
-    loads = response.json()
-
-    lights = []
-    for value in loads["data"]:
-        if value["type"] in ["dim", "dali", "onoff"]:
-            lights.append(FellerLight(value, host, apikey))
+    hub = hass.data[DOMAIN][entry.entry_id]
+    known = set()
+
+    @callback
+    def async_add_new_lights():
+        # also called after the live topology replaced a cached one
+        lights = []
+        for record in hub.coordinator.state.loads.values():
+            if record.type in ["dim", "dali", "onoff"] and record.id not in known:
+                known.add(record.id)
+                lights.append(
+                    FellerLight(
+                        record,
+                        hub,
+                        entry.options.get(CONF_PUBLISH_RATE, DEFAULT_PUBLISH_RATE),
+                    )
+                )
+        if lights:
+            async_add_entities(lights)
 
-    asyncio.get_event_loop().create_task(hello(lights, hass, host, apikey))
-    async_add_entities(lights, True)
+    async_add_new_lights()
+    entry.async_on_unload(hub.coordinator.async_add_listener(async_add_new_lights))
 
-class FellerLight(LightEntity):
+class FellerLight(FellerLoadEntity, LightEntity):
     """Representation of an Awesome Light."""
 
-    def __init__(self, data, host, apikey) -> None:
+    _targets = ("bri",)
+
+    def __init__(self, record: LoadRecord, hub, publish_rate=0) -> None:
         """Initialize an AwesomeLight."""
         # Phasecut Dimmer {'name': '00005341_0', 'device': '00005341', 'channel': 0, 'type': 'dim', 'id': 14, 'unused': False}
         # DALI Dimmer {'name': '00005341_0', 'device': '00005341', 'channel': 0, 'type': 'dali', 'id': 14, 'unused': False}
 
-        self._data = data
-        self._name = data["name"]
-        self._id = str(data["id"])
-        self._state = None
-        self._brightness = None
-        self._host = host
-        self._apikey = apikey
-        self._type = data["type"]
+        super().__init__(record, hub, publish_rate)
+        # the brightness a transition without one fades back to
+        self._last_bri = 10000
+        self._rememberBrightness()
 
     @property
     def name(self) -> str:
         """Return the display name of this light."""
-        return self._name
+        return self._record.name
 
     @property
     def unique_id(self):
@@ -154,12 +81,18 @@ class FellerLight(LightEntity):
         This method is optional. Removing it indicates to Home Assistant
         that brightness is not supported for this light.
         """
-        return self._brightness
+        bri = self._optimistic.get("bri", self._record.bri)
+        if bri is None:
+            return None
+        return int((bri / 10000) * 255)
 
     @property
     def is_on(self) -> bool | None:
         """Return true if light is on."""
-        return self._state
+        bri = self._optimistic.get("bri", self._record.bri)
+        if bri is None:
+            return None
+        return bri > 0
 
     @property
     def should_poll(self) -> bool | None:
@@ -167,105 +100,88 @@ class FellerLight(LightEntity):
 
     @property
     def color_mode(self) -> str | None:
-        if self._type == "onoff":
+        if self._record.type == "onoff":
             return "onoff"
         return "brightness"
 
     @property
     def supported_color_modes(self) -> set | None:
-        if self._type == "onoff":
+        if self._record.type == "onoff":
             return {"onoff"}
         return {"brightness"}
 
-    def turn_on(self, **kwargs: Any) -> None:
+    @property
+    def supported_features(self) -> LightEntityFeature:
+        # dimmers fade on the gateway, a single request covers the whole fade
+        if self._record.type == "onoff":
+            return LightEntityFeature(0)
+        return LightEntityFeature.TRANSITION
+
+    @gateway_command
+    async def async_turn_on(self, **kwargs: Any) -> None:
         """Instruct the light to turn on.
 
         You can skip the brightness part if your light does not support
         brightness control.
         """
 
-        if not kwargs:
-            ip = self._host
-            response = requests.put(
-                "http://" + ip + "/api/loads/" + self._id + "/ctrl",
-                headers={"authorization": "Bearer " + self._apikey},
-                json={"button": "on", "event": "click"},
-            )
-            _LOGGER.info(response.json())
-            self._state = True
-            response = requests.get(
-                "http://" + ip + "/api/loads/" + self._id,
-                headers={"authorization": "Bearer " + self._apikey},
-            )
-            self._brightness = int(
-                (response.json()["data"]["state"]["bri"] / 10000) * 255
-            )
-
-        else:
-            self._brightness = kwargs.get(ATTR_BRIGHTNESS, 255)
-            convertedBrightness = int((self._brightness / 255) * 10000)
+        if ATTR_BRIGHTNESS in kwargs:
+            convertedBrightness = int((kwargs[ATTR_BRIGHTNESS] / 255) * 10000)
             if convertedBrightness > 10000:
                 convertedBrightness = 10000
+        elif ATTR_TRANSITION in kwargs and self._record.type != "onoff":
+            # ctrl "on" cannot fade, fade to where the light was instead
+            convertedBrightness = self._last_bri
+        else:
+            convertedBrightness = None
 
-            ip = self._host
-            response = requests.put(
-                "http://" + ip + "/api/loads/" + self._id + "/target_state",
-                headers={"authorization": "Bearer " + self._apikey},
-                json={"bri": convertedBrightness},
-            )
-            _LOGGER.info(response.json())
-            self._state = True
-            self._brightness = int(
-                (response.json()["data"]["target_state"]["bri"] / 10000) * 255
+        if convertedBrightness is None:
+            response = await self._api.async_ctrl(self._id, "on")
+        else:
+            response = await self._api.async_set_target_state(
+                self._id, self._withTransition({"bri": convertedBrightness}, kwargs)
             )
+        _LOGGER.debug("Load %s answered %s", self._id, response)
+        self._updateOptimistic(response)
 
-    def turn_off(self, **kwargs: Any) -> None:
+    @gateway_command
+    async def async_turn_off(self, **kwargs: Any) -> None:
         """Instruct the light to turn off."""
-        ip = self._host
-        self._oldbrightness = self._brightness
-        response = requests.put(
-            "http://" + ip + "/api/loads/" + self._id + "/ctrl",
-            headers={"authorization": "Bearer " + self._apikey},
-            json={"button": "off", "event": "click"},
-        )
-        _LOGGER.info(response.json())
-        # {'data': {'id': 6, 'target_state': {'bri': 0}}, 'status': 'success'}
-        self._state = False
-        response = requests.get(
-            "http://" + ip + "/api/loads/" + self._id,
-            headers={"authorization": "Bearer " + self._apikey},
-        )
-        self._brightness = int((response.json()["data"]["state"]["bri"] / 10000) * 255)
-
-    def updatestate(self):
-        ip = self._host
-        # _LOGGER.info("requesting http://"+ip+"/api/loads/"+self._id)
-        return requests.get(
-            "http://" + ip + "/api/loads/" + self._id,
-            headers={"authorization": "Bearer " + self._apikey},
-        )
-
-    def update(self) -> None:
-        """Fetch new state data for this light.
-        This is the only method that should fetch new data for Home Assistant.
-        """
-
-        response = self.updatestate()
-        load = response.json()
-        _LOGGER.info(load)
-        # 'data': {'id': 7, 'unused': False, 'name': '000086dd_0', 'state': {'bri': 0, 'flags': {'over_current': 0, 'fading': 0, 'noise': 0, 'direction': 1, 'over_temperature': 0}}, 'device': '000086dd', 'channel': 0, 'type': 'dim'}, 'status': 'success'}
-
-        self._data = load["data"]
-        if load["data"]["state"]["bri"] > 0:
-            self._state = True
+        if ATTR_TRANSITION in kwargs and self._record.type != "onoff":
+            response = await self._api.async_set_target_state(
+                self._id, self._withTransition({"bri": 0}, kwargs)
+            )
         else:
-            self._state = False
-        self._brightness = int((load["data"]["state"]["bri"] / 10000) * 255)
-
-    def updateExternal(self, brightness):
-        self._brightness = int((brightness / 10000) * 255)
-        if self._brightness > 0:
-            self._state = True
+            response = await self._api.async_ctrl(self._id, "off")
+        _LOGGER.debug("Load %s answered %s", self._id, response)
+        # {'data': {'id': 6, 'target_state': {'bri': 0}}, 'status': 'success'}
+        self._updateOptimistic(response)
+
+    def _withTransition(self, target_state, kwargs):
+        """Add the native fade for ATTR_TRANSITION (seconds) to a target state."""
+        if ATTR_TRANSITION in kwargs and self._record.type != "onoff":
+            target_state[FADE_TIME] = int(kwargs[ATTR_TRANSITION] * 1000)
+        return target_state
+
+    def _handle_command(self, target_state: dict[str, Any]) -> None:
+        super()._handle_command(target_state)
+        self._rememberBrightness()
+
+    def _handle_coordinator_update(self) -> None:
+        super()._handle_coordinator_update()
+        self._rememberBrightness()
+
+    def _handle_event(self, record: LoadRecord, changed: bool):
+        super()._handle_event(record, changed)
+        self._rememberBrightness()
+
+    def _rememberBrightness(self) -> None:
+        """Keep the brightness of a light that is on and not fading."""
+        if "bri" in self._optimistic:
+            bri = self._optimistic["bri"]
+        elif not self._record.fading:
+            bri = self._record.bri
         else:
-            self._state = False
-        self.schedule_update_ha_state()
+            return
+        if bri:
+            self._last_bri = bri
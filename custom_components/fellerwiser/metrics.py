@@ -0,0 +1,112 @@
+"""Counters and latency histograms for the hot paths of the integration."""
+
+from __future__ import annotations
+
+from bisect import bisect_left
+import re
+from typing import Any
+
+# upper bounds of the histogram buckets in milliseconds, plus one overflow
+BUCKETS = (0.01, 0.05, 0.1, 0.5, 1, 5, 10, 50, 100, 500, 1000, 5000, 10000)
+
+# /loads/7/target_state -> /loads/{id}/target_state
+_ID = re.compile(r"/\d+")
+
+
+class Histogram:
+    """Count observations in fixed buckets; observing is a bisect and adds."""
+
+    __slots__ = ("buckets", "count", "total", "max")
+
+    def __init__(self) -> None:
+        """Initialize an empty histogram."""
+        self.buckets = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, ms: float) -> None:
+        """Add an observation in milliseconds."""
+        self.buckets[bisect_left(BUCKETS, ms)] += 1
+        self.count += 1
+        self.total += ms
+        if ms > self.max:
+            self.max = ms
+
+    @property
+    def mean(self) -> float | None:
+        """Return the mean in milliseconds, None without observations."""
+        return self.total / self.count if self.count else None
+
+    def quantile(self, q: float) -> float | None:
+        """Return the upper bound of the bucket holding the q quantile.
+
+        Capped at the largest observation.
+        """
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for index, count in enumerate(self.buckets):
+            seen += count
+            if seen >= rank and index < len(BUCKETS):
+                return min(BUCKETS[index], self.max)
+        return self.max
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the histogram for diagnostics."""
+        return {
+            "count": self.count,
+            "mean_ms": self.mean,
+            "p50_ms": self.quantile(0.5),
+            "p95_ms": self.quantile(0.95),
+            "max_ms": self.max,
+            "buckets": {
+                f"le_{bound}": count for bound, count in zip(BUCKETS, self.buckets)
+            }
+            | {"overflow": self.buckets[-1]},
+        }
+
+
+class Metrics:
+    """What the listener and the REST client of one gateway did so far.
+
+    Updated in place on the hot paths and only read when a diagnostic sensor
+    is enabled or diagnostics are downloaded.
+    """
+
+    def __init__(self) -> None:
+        """Initialize all counters at zero."""
+        self.frames_received = 0
+        self.unknown_frames = 0
+        self.malformed_frames = 0
+        self.reconnects = 0
+        # decode and dispatch of one frame
+        self.dispatch = Histogram()
+        # all REST calls, and per "METHOD /path/{id}" endpoint
+        self.requests = Histogram()
+        self.endpoints: dict[str, Histogram] = {}
+
+    def observe_request(self, method: str, path: str, ms: float) -> None:
+        """Add the latency of a REST call."""
+        self.requests.observe(ms)
+        endpoint = f"{method} {_ID.sub('/{id}', path)}"
+        histogram = self.endpoints.get(endpoint)
+        if histogram is None:
+            histogram = self.endpoints[endpoint] = Histogram()
+        histogram.observe(ms)
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return all metrics for diagnostics."""
+        return {
+            "frames_received": self.frames_received,
+            "unknown_frames": self.unknown_frames,
+            "malformed_frames": self.malformed_frames,
+            "reconnects": self.reconnects,
+            "dispatch": self.dispatch.as_dict(),
+            "requests": self.requests.as_dict(),
+            "endpoints": {
+                endpoint: histogram.as_dict()
+                for endpoint, histogram in sorted(self.endpoints.items())
+            },
+        }
@@ -0,0 +1,87 @@
+"""Mapping of bulk load commands onto the scenes of a Feller Wiser µGateway."""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Iterable
+import logging
+from typing import Any
+
+import aiohttp
+
+from .api import FellerApi
+from .state import SceneRecord
+
+_LOGGER = logging.getLogger(__name__)
+
+# the fields of a job that only sets loads; any other non-empty one, e.g.
+# scripts or notifications, makes it run more than a bulk command asked for
+PLAIN_JOB = ("id", "target_states")
+
+SceneKey = frozenset[tuple[int, frozenset[tuple[str, Any]]]]
+
+
+class SceneIndex:
+    """Find the scene whose job sets exactly a given set of loads.
+
+    A job lists the target state of every load it affects, e.g.
+
+    {"id": 210, "target_states": [{"load": 3, "level": 0, "tilt": 0}, ...]}
+
+    so a bulk command that matches it can be sent as one trigger of the job
+    instead of one request per load, and all loads start at the same time.
+    """
+
+    def __init__(self) -> None:
+        """Initialize an empty index."""
+        self._jobs: dict[SceneKey, int] = {}
+
+    async def async_build(self, api: FellerApi, scenes: Iterable[SceneRecord]) -> None:
+        """Fetch the job of every scene and index it by its target states."""
+        jobs: dict[SceneKey, int] = {}
+        for scene in scenes:
+            try:
+                job = await api.async_get_job(scene.job)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as err:
+                _LOGGER.debug("Error fetching job %s: %s", scene.job, err)
+                continue
+            targets = self._loadTargets(job.get("data", {}))
+            if not targets:
+                _LOGGER.debug("Not indexing job %s: %s", scene.job, job)
+                continue
+            try:
+                key = self.key(targets)
+            except TypeError:
+                # nested values, e.g. colors, no bulk command sets those
+                _LOGGER.debug("Not indexing job %s: %s", scene.job, targets)
+                continue
+            jobs.setdefault(key, scene.job)
+        self._jobs = jobs
+
+    @staticmethod
+    def _loadTargets(job: dict[str, Any]) -> dict[int, dict[str, Any]] | None:
+        """Return the load id -> target state mapping of a plain load job."""
+        if any(value for field, value in job.items() if field not in PLAIN_JOB):
+            return None
+        targets = {}
+        for target_state in job.get("target_states", []):
+            target_state = dict(target_state)
+            load = target_state.pop("load", None)
+            if load is None or load in targets:
+                return None
+            targets[load] = target_state
+        return targets
+
+    def match(self, targets: dict[int, dict[str, Any]]) -> int | None:
+        """Return the job that sets exactly these loads to these states."""
+        if not self._jobs:
+            return None
+        return self._jobs.get(self.key(targets))
+
+    @staticmethod
+    def key(targets: dict[int, dict[str, Any]]) -> SceneKey:
+        """Return the lookup key of a load id -> target state mapping."""
+        return frozenset(
+            (load, frozenset(target_state.items()))
+            for load, target_state in targets.items()
+        )
@@ -0,0 +1,148 @@
+"""Diagnostic sensors for the hot paths of a Feller Wiser gateway."""
+
+from __future__ import annotations
+
+from collections.abc import Callable
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import Any
+
+from homeassistant.components.sensor import (
+    SensorDeviceClass,
+    SensorEntity,
+    SensorEntityDescription,
+    SensorStateClass,
+)
+from homeassistant.const import EntityCategory, UnitOfTime
+from homeassistant.core import callback
+from homeassistant.helpers.event import async_track_time_interval
+
+from .const import DOMAIN
+
+# metrics change with every frame; the sensors sample them instead of
+# writing a state per frame, and only while enabled
+SAMPLE_INTERVAL = timedelta(seconds=30)
+
+
+@dataclass(frozen=True, kw_only=True)
+class FellerMetricDescription(SensorEntityDescription):
+    """A metric of the hub and how to read it."""
+
+    value_fn: Callable[[Any], float | int | None]
+    attributes_fn: Callable[[Any], dict[str, Any]] | None = None
+
+
+def _histogram_attributes(histogram) -> dict[str, Any]:
+    return {
+        "count": histogram.count,
+        "p50_ms": histogram.quantile(0.5),
+        "p95_ms": histogram.quantile(0.95),
+        "max_ms": histogram.max,
+    }
+
+
+METRICS: tuple[FellerMetricDescription, ...] = (
+    FellerMetricDescription(
+        key="frames_received",
+        name="Frames received",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=lambda hub: hub.metrics.frames_received,
+    ),
+    FellerMetricDescription(
+        key="unknown_frames",
+        name="Unknown frames",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=lambda hub: hub.metrics.unknown_frames,
+    ),
+    FellerMetricDescription(
+        key="malformed_frames",
+        name="Malformed frames",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=lambda hub: hub.metrics.malformed_frames,
+    ),
+    FellerMetricDescription(
+        key="reconnects",
+        name="Reconnects",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=lambda hub: hub.metrics.reconnects,
+    ),
+    FellerMetricDescription(
+        key="dispatch_time",
+        name="Frame dispatch time",
+        device_class=SensorDeviceClass.DURATION,
+        state_class=SensorStateClass.MEASUREMENT,
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        suggested_display_precision=3,
+        value_fn=lambda hub: hub.metrics.dispatch.mean,
+        attributes_fn=lambda hub: _histogram_attributes(hub.metrics.dispatch),
+    ),
+    FellerMetricDescription(
+        key="request_latency",
+        name="REST latency",
+        device_class=SensorDeviceClass.DURATION,
+        state_class=SensorStateClass.MEASUREMENT,
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        suggested_display_precision=1,
+        value_fn=lambda hub: hub.metrics.requests.mean,
+        attributes_fn=lambda hub: _histogram_attributes(hub.metrics.requests)
+        | {
+            endpoint: histogram.quantile(0.95)
+            for endpoint, histogram in hub.metrics.endpoints.items()
+        },
+    ),
+    FellerMetricDescription(
+        key="queue_depth",
+        name="Command queue depth",
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=lambda hub: hub.api.scheduler.queued,
+    ),
+)
+
+
+async def async_setup_entry(hass, entry, async_add_entities):
+    hub = hass.data[DOMAIN][entry.entry_id]
+    async_add_entities(
+        FellerMetricSensor(hub, entry.entry_id, description)
+        for description in METRICS
+    )
+
+
+class FellerMetricSensor(SensorEntity):
+    """A metric of the hub, disabled unless someone wants to look at it."""
+
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_entity_registry_enabled_default = False
+    # sampled by a timer of the sensor itself: the poll timer of a platform
+    # whose entities are all disabled outlives unloading the entry
+    _attr_should_poll = False
+
+    def __init__(
+        self, hub, entry_id: str, description: FellerMetricDescription
+    ) -> None:
+        """Initialize the sensor."""
+        self.entity_description = description
+        self._hub = hub
+        self._attr_unique_id = f"metrics-{entry_id}-{description.key}"
+        self._attr_name = f"Feller Wiser {description.name}"
+
+    async def async_added_to_hass(self) -> None:
+        """Sample the metric while the sensor is enabled."""
+        self.async_on_remove(
+            async_track_time_interval(self.hass, self._async_sample, SAMPLE_INTERVAL)
+        )
+
+    @callback
+    def _async_sample(self, now) -> None:
+        self.async_write_ha_state()
+
+    @property
+    def native_value(self) -> float | int | None:
+        """Return the current value of the metric."""
+        return self.entity_description.value_fn(self._hub)
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any] | None:
+        """Return the quantiles of a latency metric."""
+        if self.entity_description.attributes_fn is None:
+            return None
+        return self.entity_description.attributes_fn(self._hub)
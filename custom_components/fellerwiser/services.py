@@ -0,0 +1,172 @@
+"""Services for the Feller Wiser integration."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import Any
+
+import aiohttp
+
+import voluptuous as vol
+
+from homeassistant.const import ATTR_ENTITY_ID
+from homeassistant.core import (
+    HomeAssistant,
+    ServiceCall,
+    ServiceResponse,
+    SupportsResponse,
+    callback,
+)
+from homeassistant.exceptions import ServiceValidationError
+import homeassistant.helpers.config_validation as cv
+from homeassistant.helpers import entity_registry as er
+
+from .const import DOMAIN
+from .events import LoadEvent
+
+_LOGGER = logging.getLogger(__name__)
+
+SERVICE_BULK_CONTROL = "bulk_control"
+ATTR_TARGETS = "targets"
+
+# target_state fields of a load, in gateway units
+TARGET_FIELDS = {
+    vol.Optional("bri"): vol.All(vol.Coerce(int), vol.Range(min=0, max=10000)),
+    vol.Optional("level"): vol.All(vol.Coerce(int), vol.Range(min=0, max=10000)),
+    vol.Optional("tilt"): vol.All(vol.Coerce(int), vol.Range(min=0, max=9)),
+}
+# the fields each kind of entity accepts, by unique_id prefix
+PLATFORM_FIELDS = {"light": {"bri"}, "cover": {"level", "tilt"}}
+
+BULK_CONTROL_SCHEMA = vol.Schema(
+    {
+        vol.Required(ATTR_TARGETS): vol.All(
+            cv.ensure_list,
+            [
+                vol.All(
+                    vol.Schema(
+                        {vol.Required(ATTR_ENTITY_ID): cv.entity_id, **TARGET_FIELDS}
+                    ),
+                    cv.has_at_least_one_key(*(str(key) for key in TARGET_FIELDS)),
+                )
+            ],
+        )
+    }
+)
+
+
+@callback
+def async_setup_services(hass: HomeAssistant) -> None:
+    """Register the integration services."""
+
+    async def async_bulk_control(call: ServiceCall) -> ServiceResponse:
+        """Send target states to many loads at once.
+
+        The commands run concurrently within each gateway's request limit.
+        Once all of them have finished, the affected entities are updated in
+        a single pass.
+        """
+        registry = er.async_get(hass)
+        commands = []
+        for target in call.data[ATTR_TARGETS]:
+            entity_id = target[ATTR_ENTITY_ID]
+            entry = registry.async_get(entity_id)
+            if (
+                entry is None
+                or entry.platform != DOMAIN
+                or entry.config_entry_id not in hass.data.get(DOMAIN, {})
+                or entry.unique_id.split("-")[0] not in PLATFORM_FIELDS
+            ):
+                raise ServiceValidationError(
+                    f"{entity_id} is not a Feller Wiser light or cover"
+                )
+            platform, load_id = entry.unique_id.split("-")[:2]
+            hub = hass.data[DOMAIN][entry.config_entry_id]
+            target_state = {
+                key: value for key, value in target.items() if key != ATTR_ENTITY_ID
+            }
+            if invalid := target_state.keys() - PLATFORM_FIELDS[platform]:
+                raise ServiceValidationError(
+                    f"{entity_id} is a {platform} and does not accept "
+                    + ", ".join(sorted(invalid))
+                )
+            commands.append((entity_id, hub, int(load_id), target_state))
+
+        # one batch per gateway, so each can be matched against its scenes
+        batches: dict[int, list[int]] = {}
+        for index, (_, hub, _, _) in enumerate(commands):
+            batches.setdefault(id(hub), []).append(index)
+
+        responses: list[Any] = [None] * len(commands)
+
+        async def async_send_batch(indexes: list[int]) -> None:
+            hub = commands[indexes[0]][1]
+            targets = {commands[index][2]: commands[index][3] for index in indexes}
+            if (
+                hub.scene_index is not None
+                and len(targets) == len(indexes)
+                and (job := hub.scene_index.match(targets)) is not None
+            ):
+                try:
+                    await hub.api.async_trigger_job(job)
+                except (aiohttp.ClientError, asyncio.TimeoutError) as err:
+                    _LOGGER.debug(
+                        "Triggering job %s failed, sending loads: %s", job, err
+                    )
+                else:
+                    for index in indexes:
+                        responses[index] = {}
+                    return
+            sent = await asyncio.gather(
+                *(
+                    hub.api.async_set_target_state(
+                        commands[index][2], commands[index][3]
+                    )
+                    for index in indexes
+                ),
+                return_exceptions=True,
+            )
+            for index, response in zip(indexes, sent):
+                responses[index] = response
+
+        await asyncio.gather(
+            *(async_send_batch(indexes) for indexes in batches.values())
+        )
+
+        results = []
+        confirmed = []
+        for (entity_id, hub, load_id, target_state), response in zip(
+            commands, responses
+        ):
+            if isinstance(response, Exception):
+                _LOGGER.warning("Bulk control of %s failed: %s", entity_id, response)
+                results.append(
+                    {"entity_id": entity_id, "success": False, "error": str(response)}
+                )
+                continue
+            results.append({"entity_id": entity_id, "success": True})
+            confirmed.append(
+                (
+                    hub,
+                    load_id,
+                    response.get("data", {}).get("target_state", target_state),
+                )
+            )
+
+        # one state write per entity, after the whole batch; the entities
+        # show the targets until the gateway pushes the state they led to
+        for hub, load_id, target_state in confirmed:
+            hub.notify(LoadEvent.kind, load_id, target_state)
+
+        if call.return_response:
+            return {"results": results}
+        return None
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_BULK_CONTROL,
+        async_bulk_control,
+        schema=BULK_CONTROL_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
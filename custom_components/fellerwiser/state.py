@@ -0,0 +1,218 @@
+"""Central state store for the resources of a Feller Wiser µGateway."""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any
+
+from .events import HvacGroupEvent, LoadEvent
+
+
+@dataclass(slots=True)
+class LoadRecord:
+    """A load and its last known state.
+
+    {'id': 7, 'name': '000086dd_0', 'type': 'dim', 'device': '000086dd',
+    'channel': 0, 'state': {'bri': 0, 'flags': {'fading': 0, ...}}}
+    """
+
+    id: int
+    name: str
+    type: str
+    device: str | None = None
+    channel: int | None = None
+    # dim, dali, onoff: 0..10000
+    bri: int | None = None
+    # motor: 0 = open .. 10000 = closed, tilt 0..9, moving "up"/"down"/"stop"
+    level: int | None = None
+    tilt: int | None = None
+    moving: str | None = None
+    fading: int = 0
+
+    def update_state(self, state: dict[str, Any]) -> None:
+        """Take the state reported by the REST API."""
+        self.bri = state.get("bri", self.bri)
+        self.level = state.get("level", self.level)
+        self.tilt = state.get("tilt", self.tilt)
+        self.moving = state.get("moving", self.moving)
+        flags = state.get("flags")
+        if isinstance(flags, dict):
+            self.fading = flags.get("fading", self.fading)
+
+    def apply(self, event: LoadEvent) -> bool:
+        """Take the state from a push event and return whether it changed."""
+        before = (self.bri, self.level, self.tilt, self.moving, self.fading)
+        if event.bri is not None:
+            self.bri = event.bri
+        if event.level is not None:
+            self.level = event.level
+        if event.tilt is not None:
+            self.tilt = event.tilt
+        if event.moving is not None:
+            self.moving = event.moving
+        self.fading = event.fading
+        return before != (self.bri, self.level, self.tilt, self.moving, self.fading)
+
+    def topology(self) -> dict[str, Any]:
+        """Return the load as discovered, without state."""
+        return {
+            "id": self.id,
+            "name": self.name,
+            "type": self.type,
+            "device": self.device,
+            "channel": self.channel,
+        }
+
+
+@dataclass(slots=True)
+class HvacGroupRecord:
+    """An hvac group and its last known state."""
+
+    id: int
+    name: str
+    on: bool | None = None
+    ambient_temperature: float | None = None
+    target_temperature: float | None = None
+    cooling: int | None = None
+
+    def update_state(self, state: dict[str, Any]) -> None:
+        """Take the state reported by the REST API."""
+        self.on = state.get("on", self.on)
+        self.ambient_temperature = state.get(
+            "ambient_temperature", self.ambient_temperature
+        )
+        self.target_temperature = state.get(
+            "target_temperature", self.target_temperature
+        )
+        flags = state.get("flags")
+        if isinstance(flags, dict):
+            self.cooling = flags.get("cooling", self.cooling)
+
+    def apply(self, event: HvacGroupEvent) -> bool:
+        """Take the state from a push event and return whether it changed."""
+        before = (self.on, self.ambient_temperature, self.target_temperature, self.cooling)
+        if event.on is not None:
+            self.on = event.on
+        if event.ambient_temperature is not None:
+            self.ambient_temperature = event.ambient_temperature
+        if event.target_temperature is not None:
+            self.target_temperature = event.target_temperature
+        if event.cooling is not None:
+            self.cooling = event.cooling
+        return before != (
+            self.on,
+            self.ambient_temperature,
+            self.target_temperature,
+            self.cooling,
+        )
+
+    def topology(self) -> dict[str, Any]:
+        """Return the hvac group as discovered, without state."""
+        return {"id": self.id, "name": self.name}
+
+
+@dataclass(slots=True)
+class SceneRecord:
+    """A scene and the job that runs it.
+
+    { "type": 20, "name": "Alle Storen auf", "sceneButtons": [], "kind": 24,
+    "id": 211, "job": 210 }
+    """
+
+    id: int
+    name: str
+    type: int | None
+    kind: int | None
+    job: int
+
+    def topology(self) -> dict[str, Any]:
+        """Return the scene as discovered."""
+        return {
+            "id": self.id,
+            "name": self.name,
+            "type": self.type,
+            "kind": self.kind,
+            "job": self.job,
+        }
+
+
+class GatewayState:
+    """The loads, hvac groups and scenes of one gateway.
+
+    Records are updated in place, so entities can keep a reference to theirs
+    and read it without any REST call.
+    """
+
+    def __init__(self) -> None:
+        """Initialize an empty store."""
+        self.loads: dict[int, LoadRecord] = {}
+        self.hvacgroups: dict[int, HvacGroupRecord] = {}
+        self.scenes: dict[int, SceneRecord] = {}
+
+    def set_loads(self, loads: list[dict[str, Any]]) -> None:
+        """Replace the loads with the ones from /api/loads."""
+        records = {}
+        for load in loads:
+            record = self.loads.get(load["id"])
+            if record is None:
+                record = LoadRecord(load["id"], load["name"], load["type"])
+            record.name = load["name"]
+            record.type = load["type"]
+            record.device = load.get("device")
+            record.channel = load.get("channel")
+            if isinstance(load.get("state"), dict):
+                record.update_state(load["state"])
+            records[record.id] = record
+        self.loads = records
+
+    def set_hvacgroups(self, hvacgroups: list[dict[str, Any]]) -> None:
+        """Replace the hvac groups with the ones from /api/hvacgroups."""
+        records = {}
+        for group in hvacgroups:
+            record = self.hvacgroups.get(group["id"])
+            if record is None:
+                record = HvacGroupRecord(group["id"], group["name"])
+            record.name = group["name"]
+            if isinstance(group.get("state"), dict):
+                record.update_state(group["state"])
+            records[record.id] = record
+        self.hvacgroups = records
+
+    def set_scenes(self, scenes: list[dict[str, Any]]) -> None:
+        """Replace the scenes with the ones from /api/scenes."""
+        records = {}
+        for scene in scenes:
+            record = self.scenes.get(scene["id"])
+            if record is None:
+                record = SceneRecord(
+                    scene["id"], scene["name"], None, None, scene["job"]
+                )
+            record.name = scene["name"]
+            record.type = scene.get("type")
+            record.kind = scene.get("kind")
+            record.job = scene["job"]
+            records[record.id] = record
+        self.scenes = records
+
+    def apply(
+        self, event: LoadEvent | HvacGroupEvent
+    ) -> tuple[LoadRecord | HvacGroupRecord | None, bool]:
+        """Apply a push event, return its record and whether the state changed.
+
+        The record is None for resources the store does not know.
+        """
+        if isinstance(event, LoadEvent):
+            record = self.loads.get(event.id)
+        else:
+            record = self.hvacgroups.get(event.id)
+        if record is None:
+            return None, False
+        return record, record.apply(event)
+
+    def topology(self) -> dict[str, list[dict[str, Any]]]:
+        """Return all resources without state, in the form the cache stores."""
+        return {
+            "loads": [record.topology() for record in self.loads.values()],
+            "hvacgroups": [record.topology() for record in self.hvacgroups.values()],
+            "scenes": [record.topology() for record in self.scenes.values()],
+        }
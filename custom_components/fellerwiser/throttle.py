@@ -0,0 +1,48 @@
+"""Rate limiting of entity state writes."""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from collections.abc import Callable
+
+
+class StateThrottle:
+    """Write an entity state at most rate times per second.
+
+    The first change is written right away. Changes arriving faster than the
+    rate allows are folded into one trailing write at the end of the
+    interval, so the final state of a fade or motor run is always written.
+    A rate of 0 disables the throttle.
+    """
+
+    def __init__(self, write: Callable[[], None], rate: float) -> None:
+        """Initialize the throttle."""
+        self._write = write
+        self._interval = 1 / rate if rate > 0 else 0
+        self._last = -self._interval
+        self._timer: asyncio.TimerHandle | None = None
+
+    def publish(self) -> None:
+        """Write the current state now or as soon as the rate allows."""
+        if self._timer is not None:
+            # the pending trailing write will pick up this change
+            return
+        now = time.monotonic()
+        wait = self._last + self._interval - now
+        if wait <= 0:
+            self._last = now
+            self._write()
+            return
+        self._timer = asyncio.get_running_loop().call_later(wait, self._flush)
+
+    def cancel(self) -> None:
+        """Drop a pending trailing write, e.g. when the entity is removed."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+    def _flush(self) -> None:
+        self._timer = None
+        self._last = time.monotonic()
+        self._write()
@@ -0,0 +1 @@
+"""Tests for the Feller Wiser integration."""
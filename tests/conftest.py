@@ -0,0 +1,47 @@
+"""Fixtures for the Feller Wiser tests, run against the offline simulator."""
+
+from __future__ import annotations
+
+from collections.abc import AsyncIterator
+from pathlib import Path
+import sys
+
+import pytest
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from homeassistant.core import HomeAssistant
+
+from custom_components.fellerwiser.const import DOMAIN
+
+sys.path.insert(
+    0, str(Path(__file__).parents[1] / "custom_components" / DOMAIN / "examples")
+)
+
+import simulator  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def auto_enable_custom_integrations(enable_custom_integrations):
+    """Load the integration from custom_components."""
+    yield
+
+
+@pytest.fixture
+async def gateway(socket_enabled) -> AsyncIterator[simulator.Gateway]:
+    """Serve a simulated gateway with a few loads of every type on localhost."""
+    simulated = simulator.Gateway(loads=8, hvacgroups=1)
+    runner, _ = await simulator.start(simulated)
+    yield simulated
+    await runner.cleanup()
+
+
+@pytest.fixture
+def config_entry(hass: HomeAssistant, gateway: simulator.Gateway) -> MockConfigEntry:
+    """Return a config entry for the simulated gateway, added to hass."""
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        title="Feller Wiser",
+        data={"host": gateway.host, "apikey": simulator.APIKEY},
+    )
+    entry.add_to_hass(hass)
+    return entry
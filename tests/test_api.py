@@ -0,0 +1,160 @@
+"""Tests for the Feller Wiser REST client."""
+
+from __future__ import annotations
+
+import asyncio
+from typing import Any
+
+import pytest
+
+from custom_components.fellerwiser.api import FADE_TIME, CommandCoalescer
+
+TARGET = "/loads/3/target_state"
+CTRL = "/loads/3/ctrl"
+
+
+class FakeSend:
+    """Record the commands sent and hold the first one until released."""
+
+    def __init__(self) -> None:
+        self.sent: list[tuple[str, dict[str, Any]]] = []
+        self.release = asyncio.Event()
+
+    async def __call__(self, path: str, payload: dict[str, Any]) -> dict[str, Any]:
+        self.sent.append((path, dict(payload)))
+        if len(self.sent) == 1:
+            await self.release.wait()
+        return {"status": "success", "data": {"path": path, **payload}}
+
+
+async def _queue(
+    coalescer: CommandCoalescer,
+    send: FakeSend,
+    *commands: tuple[str, dict[str, Any], bool],
+) -> list[asyncio.Task]:
+    """Send the first command, queue the others behind it and release it."""
+    tasks = []
+    for path, payload, merge in commands:
+        tasks.append(
+            asyncio.create_task(
+                coalescer.async_send("/loads/3", path, payload, send, merge)
+            )
+        )
+        # let each command reach the coalescer in order
+        await asyncio.sleep(0)
+    send.release.set()
+    await asyncio.gather(*tasks)
+    return tasks
+
+
+async def test_target_states_merge() -> None:
+    """Test target states queued behind one in flight go out as one."""
+    coalescer = CommandCoalescer()
+    send = FakeSend()
+    tasks = await _queue(
+        coalescer,
+        send,
+        (TARGET, {"level": 0}, True),
+        (TARGET, {"level": 5000}, True),
+        (TARGET, {"tilt": 4}, True),
+    )
+
+    assert send.sent == [
+        (TARGET, {"level": 0}),
+        (TARGET, {"level": 5000, "tilt": 4}),
+    ]
+    # both callers of the merged command get its response
+    assert tasks[1].result() is tasks[2].result()
+    assert tasks[1].result()["data"] == {"path": TARGET, "level": 5000, "tilt": 4}
+
+
+async def test_latest_target_wins() -> None:
+    """Test the newest value of a key replaces the queued one."""
+    coalescer = CommandCoalescer()
+    send = FakeSend()
+    await _queue(
+        coalescer,
+        send,
+        (TARGET, {"bri": 1000}, True),
+        (TARGET, {"bri": 2000}, True),
+        (TARGET, {"bri": 3000}, True),
+    )
+
+    assert send.sent == [(TARGET, {"bri": 1000}), (TARGET, {"bri": 3000})]
+
+
+async def test_ctrl_replaces_queued_target() -> None:
+    """Test a ctrl command drops a queued target instead of following it."""
+    coalescer = CommandCoalescer()
+    send = FakeSend()
+    await _queue(
+        coalescer,
+        send,
+        (TARGET, {"bri": 5000}, True),
+        (TARGET, {"bri": 6000}, True),
+        (CTRL, {"button": "off", "event": "click"}, False),
+    )
+
+    # the light ends up off, not at 6000
+    assert send.sent == [
+        (TARGET, {"bri": 5000}),
+        (CTRL, {"button": "off", "event": "click"}),
+    ]
+
+
+async def test_target_replaces_queued_ctrl() -> None:
+    """Test a target state is not merged into a queued ctrl command."""
+    coalescer = CommandCoalescer()
+    send = FakeSend()
+    await _queue(
+        coalescer,
+        send,
+        (TARGET, {"bri": 5000}, True),
+        (CTRL, {"button": "on", "event": "click"}, False),
+        (TARGET, {"bri": 2000}, True),
+    )
+
+    assert send.sent == [(TARGET, {"bri": 5000}), (TARGET, {"bri": 2000})]
+
+
+@pytest.mark.parametrize(
+    ("newest", "expected"),
+    [
+        ({"bri": 2000}, {"bri": 2000}),
+        ({"bri": 2000, FADE_TIME: 500}, {"bri": 2000, FADE_TIME: 500}),
+    ],
+)
+async def test_fade_time_dropped_on_merge(
+    newest: dict[str, Any], expected: dict[str, Any]
+) -> None:
+    """Test a merged command only fades if its newest target state does."""
+    coalescer = CommandCoalescer()
+    send = FakeSend()
+    await _queue(
+        coalescer,
+        send,
+        (TARGET, {"bri": 0}, True),
+        (TARGET, {"bri": 8000, FADE_TIME: 3000}, True),
+        (TARGET, newest, True),
+    )
+
+    assert send.sent == [(TARGET, {"bri": 0}), (TARGET, expected)]
+
+
+async def test_error_reaches_every_caller() -> None:
+    """Test a failed command raises for every caller merged into it."""
+    coalescer = CommandCoalescer()
+
+    async def send(path: str, payload: dict[str, Any]) -> dict[str, Any]:
+        await asyncio.sleep(0)
+        raise asyncio.TimeoutError
+
+    tasks = [
+        asyncio.create_task(
+            coalescer.async_send("/loads/3", TARGET, {"bri": bri}, send)
+        )
+        for bri in (1000, 2000)
+    ]
+    results = await asyncio.gather(*tasks, return_exceptions=True)
+
+    assert all(isinstance(result, asyncio.TimeoutError) for result in results)
@@ -0,0 +1,144 @@
+"""Tests for setting up, reloading and unloading a Feller Wiser gateway."""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Callable
+
+from unittest.mock import patch
+
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from homeassistant.config_entries import ConfigEntryState
+from homeassistant.const import STATE_UNAVAILABLE
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers import entity_registry as er
+
+from custom_components.fellerwiser.const import DOMAIN
+
+import simulator
+
+# seconds to wait for the listener to (dis)connect
+SETTLE_TIMEOUT = 5
+
+
+async def _settle(hass: HomeAssistant, condition: Callable[[], bool]) -> None:
+    """Wait until condition holds."""
+    async with asyncio.timeout(SETTLE_TIMEOUT):
+        while not condition():
+            await asyncio.sleep(0.05)
+    await hass.async_block_till_done()
+
+
+async def test_setup_and_unload(
+    hass: HomeAssistant, config_entry: MockConfigEntry, gateway: simulator.Gateway
+) -> None:
+    """Test the entry opens one WebSocket and closes it on unload."""
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    await _settle(hass, lambda: gateway.open_connections == 1)
+    assert config_entry.state is ConfigEntryState.LOADED
+    assert hass.states.async_entity_ids("light")
+    assert hass.states.async_entity_ids("cover")
+
+    assert await hass.config_entries.async_unload(config_entry.entry_id)
+    await _settle(hass, lambda: gateway.open_connections == 0)
+    assert config_entry.state is ConfigEntryState.NOT_LOADED
+
+
+async def test_reload_does_not_leak(
+    hass: HomeAssistant, config_entry: MockConfigEntry, gateway: simulator.Gateway
+) -> None:
+    """Test reloads leave no WebSocket connection or task behind."""
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    await _settle(hass, lambda: gateway.open_connections == 1)
+    tasks = len(asyncio.all_tasks())
+
+    for _ in range(3):
+        assert await hass.config_entries.async_reload(config_entry.entry_id)
+        await _settle(
+            hass,
+            lambda: gateway.open_connections == 1
+            and len(asyncio.all_tasks()) <= tasks,
+        )
+
+    assert gateway.open_connections == 1
+    assert len(asyncio.all_tasks()) == tasks
+    assert gateway.connections == 4
+
+    assert await hass.config_entries.async_unload(config_entry.entry_id)
+    await _settle(hass, lambda: gateway.open_connections == 0)
+
+
+async def test_start_from_cache_while_gateway_down(
+    hass: HomeAssistant, socket_enabled
+) -> None:
+    """Test the state is fetched once a gateway that was down at startup is back."""
+    gateway = simulator.Gateway(loads=8, hvacgroups=1)
+    runner, host = await simulator.start(gateway)
+    entry = MockConfigEntry(
+        domain=DOMAIN, data={"host": host, "apikey": simulator.APIKEY}
+    )
+    entry.add_to_hass(hass)
+    # the first start fills the discovery cache
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await _settle(hass, lambda: gateway.open_connections == 1)
+    assert await hass.config_entries.async_unload(entry.entry_id)
+    await runner.cleanup()
+
+    with patch("custom_components.fellerwiser.hub.BACKOFF_MAX", 0.1):
+        assert await hass.config_entries.async_setup(entry.entry_id)
+        await hass.async_block_till_done()
+        entity_id = er.async_get(hass).async_get_entity_id(
+            "light", DOMAIN, "light-4"
+        )
+        # the reconcile behind the start from the cache fails
+        await _settle(
+            hass, lambda: hass.states.get(entity_id).state == STATE_UNAVAILABLE
+        )
+
+        gateway.reset_counters()
+        address, port = host.split(":")
+        runner, _ = await simulator.start(gateway, address, int(port))
+        await _settle(hass, lambda: gateway.requests["GET /api/loads"] == 1)
+        assert hass.states.get(entity_id).state == "off"
+
+        await gateway.push({"load": {"id": 4, "state": {"bri": 10000}}})
+        await _settle(hass, lambda: hass.states.get(entity_id).state == "on")
+
+        assert await hass.config_entries.async_unload(entry.entry_id)
+    await runner.cleanup()
+
+
+async def test_scenes_timeout_on_first_start(
+    hass: HomeAssistant, config_entry: MockConfigEntry, gateway: simulator.Gateway
+) -> None:
+    """Test a scene fetch timing out on a first start is retried later."""
+    with patch(
+        "custom_components.fellerwiser.api.FellerApi.async_get_scenes",
+        side_effect=asyncio.TimeoutError,
+    ):
+        assert not await hass.config_entries.async_setup(config_entry.entry_id)
+    assert config_entry.state is ConfigEntryState.SETUP_RETRY
+
+
+async def test_scenes_timeout_on_start_from_cache(
+    hass: HomeAssistant, config_entry: MockConfigEntry, gateway: simulator.Gateway
+) -> None:
+    """Test a scene fetch timing out behind a cached start still refreshes."""
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    await _settle(hass, lambda: gateway.open_connections == 1)
+    assert await hass.config_entries.async_unload(config_entry.entry_id)
+    await _settle(hass, lambda: gateway.open_connections == 0)
+
+    gateway.reset_counters()
+    with patch(
+        "custom_components.fellerwiser.api.FellerApi.async_get_scenes",
+        side_effect=asyncio.TimeoutError,
+    ):
+        assert await hass.config_entries.async_setup(config_entry.entry_id)
+        await _settle(
+            hass,
+            lambda: gateway.requests["GET /api/loads"] == 1
+            and gateway.requests["GET /api/hvacgroups"] == 1,
+        )
+    assert await hass.config_entries.async_unload(config_entry.entry_id)
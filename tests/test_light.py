@@ -0,0 +1,72 @@
+"""Tests for the Feller Wiser lights."""
+
+from __future__ import annotations
+
+import asyncio
+
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from homeassistant.components.light import ATTR_BRIGHTNESS, ATTR_TRANSITION
+from homeassistant.const import ATTR_ENTITY_ID
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers import entity_registry as er
+
+from custom_components.fellerwiser.const import DOMAIN
+
+import simulator
+
+# seconds to wait for the listener to connect
+SETTLE_TIMEOUT = 5
+
+
+async def _async_setup_dimmer(
+    hass: HomeAssistant, config_entry: MockConfigEntry, gateway: simulator.Gateway
+) -> tuple[str, dict]:
+    """Set the entry up and return the entity id and load of a dimmer."""
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    async with asyncio.timeout(SETTLE_TIMEOUT):
+        while gateway.open_connections != 1:
+            await asyncio.sleep(0.05)
+    load = next(load for load in gateway.loads.values() if load["type"] == "dim")
+    entity_id = er.async_get(hass).async_get_entity_id(
+        "light", DOMAIN, f"light-{load['id']}"
+    )
+    return entity_id, load
+
+
+async def _async_call(hass: HomeAssistant, service: str, **data) -> None:
+    await hass.services.async_call("light", service, data, blocking=True)
+    await asyncio.sleep(0.1)
+    await hass.async_block_till_done()
+
+
+async def test_turn_on_transition_keeps_brightness(
+    hass: HomeAssistant, config_entry: MockConfigEntry, gateway: simulator.Gateway
+) -> None:
+    """Test a transition alone does not set a dimmed light to full brightness."""
+    entity_id, load = await _async_setup_dimmer(hass, config_entry, gateway)
+    await _async_call(
+        hass, "turn_on", **{ATTR_ENTITY_ID: entity_id, ATTR_BRIGHTNESS: 63}
+    )
+    brightness = hass.states.get(entity_id).attributes[ATTR_BRIGHTNESS]
+    bri = load["state"]["bri"]
+    assert 0 < bri < 10000
+
+    await _async_call(
+        hass, "turn_on", **{ATTR_ENTITY_ID: entity_id, ATTR_TRANSITION: 2}
+    )
+    assert load["state"]["bri"] == bri
+    assert hass.states.get(entity_id).attributes[ATTR_BRIGHTNESS] == brightness
+
+    # off and back on with a transition fades to the brightness from before
+    await _async_call(
+        hass, "turn_off", **{ATTR_ENTITY_ID: entity_id, ATTR_TRANSITION: 2}
+    )
+    assert load["state"]["bri"] == 0
+    await _async_call(
+        hass, "turn_on", **{ATTR_ENTITY_ID: entity_id, ATTR_TRANSITION: 2}
+    )
+    assert load["state"]["bri"] == bri
+    assert hass.states.get(entity_id).attributes[ATTR_BRIGHTNESS] == brightness
+
+    assert await hass.config_entries.async_unload(config_entry.entry_id)
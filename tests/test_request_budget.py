@@ -0,0 +1,185 @@
+"""Check the requests each operation of the integration sends to a gateway.
+
+Setup, every light, cover, climate and button command, a reconnect and a
+reload run against the simulator, and the HTTP requests and WebSocket
+connections reaching it are counted, so contracts like "one toggle = one
+request" cannot regress unnoticed.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+import pytest
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from homeassistant.const import ATTR_ENTITY_ID, Platform
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers import entity_registry as er
+
+from custom_components.fellerwiser.const import DOMAIN
+
+import simulator
+
+# seconds to wait for background work such as a reconnect to settle
+SETTLE_TIMEOUT = 5
+
+# operation: (max HTTP requests, max WebSocket connections); every entity
+# command in COMMANDS is exactly one request on the open connection
+BUDGETS = {
+    # loads, hvac groups, scenes; one shared WebSocket
+    "setup": (3, 1),
+    # one bulk refresh for the events missed while disconnected
+    "reconnect": (2, 1),
+    # loads, hvac groups, scenes fetched behind a start from the cache
+    "reload": (3, 1),
+}
+
+# operation: (platform, load type or None, service, service data)
+COMMANDS: dict[str, tuple[str, str | None, str, dict[str, Any]]] = {
+    "light turn_on": ("light", "dim", "turn_on", {}),
+    "light turn_on brightness": ("light", "dim", "turn_on", {"brightness": 128}),
+    "light turn_on transition": ("light", "dim", "turn_on", {"transition": 2}),
+    "light turn_off": ("light", "dim", "turn_off", {}),
+    "light turn_off transition": ("light", "dim", "turn_off", {"transition": 2}),
+    "cover open": ("cover", "motor", "open_cover", {}),
+    "cover close": ("cover", "motor", "close_cover", {}),
+    "cover set_position": ("cover", "motor", "set_cover_position", {"position": 50}),
+    "cover stop": ("cover", "motor", "stop_cover", {}),
+    "cover open_tilt": ("cover", "motor", "open_cover_tilt", {}),
+    "cover close_tilt": ("cover", "motor", "close_cover_tilt", {}),
+    "cover set_tilt_position": (
+        "cover",
+        "motor",
+        "set_cover_tilt_position",
+        {"tilt_position": 50},
+    ),
+    "climate set_temperature": (
+        "climate",
+        None,
+        "set_temperature",
+        {"temperature": 22},
+    ),
+    "button press": ("button", None, "press", {}),
+}
+
+
+async def _settle(hass: HomeAssistant, condition: Callable[[], bool]) -> None:
+    """Wait until condition holds, then a little longer for stray requests."""
+    async with asyncio.timeout(SETTLE_TIMEOUT):
+        while not condition():
+            await asyncio.sleep(0.05)
+    await asyncio.sleep(0.2)
+    await hass.async_block_till_done()
+
+
+async def _assert_budget(
+    gateway: simulator.Gateway, name: str, operation: Callable[[], Awaitable]
+) -> None:
+    """Run operation and compare what reached the gateway with its budget."""
+    gateway.reset_counters()
+    await operation()
+    max_requests, max_connections = BUDGETS[name]
+    assert sum(gateway.requests.values()) <= max_requests, dict(gateway.requests)
+    assert gateway.connections <= max_connections
+
+
+async def _async_setup(
+    hass: HomeAssistant, config_entry: MockConfigEntry, gateway: simulator.Gateway
+) -> None:
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    await _settle(hass, lambda: gateway.open_connections == 1)
+
+
+def _entity_id(hass: HomeAssistant, gateway: simulator.Gateway, platform: str, type):
+    """Return the entity of the first resource of a platform and load type."""
+    if platform == "climate":
+        unique_id = f"thermostat-{next(iter(gateway.hvacgroups))}"
+    elif platform == "button":
+        unique_id = f"scene-{gateway.scenes[0]['id']}"
+    else:
+        load = next(load for load in gateway.loads.values() if load["type"] == type)
+        unique_id = f"{platform}-{load['id']}"
+    return er.async_get(hass).async_get_entity_id(platform, DOMAIN, unique_id)
+
+
+async def test_setup(
+    hass: HomeAssistant, config_entry: MockConfigEntry, gateway: simulator.Gateway
+) -> None:
+    """Test setting up fetches all resources in bulk and opens one WebSocket."""
+    await _assert_budget(
+        gateway, "setup", lambda: _async_setup(hass, config_entry, gateway)
+    )
+    assert await hass.config_entries.async_unload(config_entry.entry_id)
+
+
+@pytest.mark.parametrize("name", list(COMMANDS))
+async def test_command(
+    hass: HomeAssistant,
+    config_entry: MockConfigEntry,
+    gateway: simulator.Gateway,
+    name: str,
+) -> None:
+    """Test an entity command is a single request."""
+    platform, type, service, data = COMMANDS[name]
+    await _async_setup(hass, config_entry, gateway)
+    if platform == Platform.CLIMATE:
+        # not enabled by default, set up on its own for the check
+        await hass.config_entries.async_forward_entry_setups(
+            config_entry, [Platform.CLIMATE]
+        )
+        await hass.async_block_till_done()
+    entity_id = _entity_id(hass, gateway, platform, type)
+    assert entity_id is not None
+
+    async def command() -> None:
+        await hass.services.async_call(
+            platform, service, {ATTR_ENTITY_ID: entity_id, **data}, blocking=True
+        )
+        await _settle(hass, lambda: True)
+
+    gateway.reset_counters()
+    await command()
+    assert sum(gateway.requests.values()) == 1, dict(gateway.requests)
+    assert gateway.connections == 0
+
+    if platform == Platform.CLIMATE:
+        assert await hass.config_entries.async_unload_platforms(
+            config_entry, [Platform.CLIMATE]
+        )
+    assert await hass.config_entries.async_unload(config_entry.entry_id)
+
+
+async def test_reconnect(
+    hass: HomeAssistant, config_entry: MockConfigEntry, gateway: simulator.Gateway
+) -> None:
+    """Test a reconnect costs one bulk refresh and one WebSocket."""
+    await _async_setup(hass, config_entry, gateway)
+
+    async def reconnect() -> None:
+        await gateway.drop()
+        # the bulk refresh runs in the background after reconnecting
+        await _settle(
+            hass,
+            lambda: gateway.connections >= 1
+            and gateway.requests["GET /api/hvacgroups"] >= 1,
+        )
+
+    await _assert_budget(gateway, "reconnect", reconnect)
+    assert await hass.config_entries.async_unload(config_entry.entry_id)
+
+
+async def test_reload(
+    hass: HomeAssistant, config_entry: MockConfigEntry, gateway: simulator.Gateway
+) -> None:
+    """Test a reload fetches the resources in bulk and opens one WebSocket."""
+    await _async_setup(hass, config_entry, gateway)
+
+    async def reload() -> None:
+        assert await hass.config_entries.async_reload(config_entry.entry_id)
+        await _settle(hass, lambda: gateway.connections >= 1)
+
+    await _assert_budget(gateway, "reload", reload)
+    assert await hass.config_entries.async_unload(config_entry.entry_id)
@@ -0,0 +1,99 @@
+"""Tests for mapping bulk commands onto Feller Wiser scenes."""
+
+from __future__ import annotations
+
+import asyncio
+from typing import Any
+
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from homeassistant.core import HomeAssistant
+
+from custom_components.fellerwiser.const import CONF_SCENE_OPTIMIZER, DOMAIN
+from custom_components.fellerwiser.scenes import SceneIndex
+from custom_components.fellerwiser.state import SceneRecord
+
+import simulator
+
+# seconds to wait for the background index build
+SETTLE_TIMEOUT = 5
+
+
+class FakeApi:
+    """Answer job requests from a dict."""
+
+    def __init__(self, jobs: dict[int, dict[str, Any]]) -> None:
+        self.jobs = jobs
+
+    async def async_get_job(self, id: int) -> dict[str, Any]:
+        if id not in self.jobs:
+            raise asyncio.TimeoutError
+        return {"status": "success", "data": self.jobs[id]}
+
+
+def _scene(job: int) -> SceneRecord:
+    return SceneRecord(job + 1, f"scene {job}", 20, 24, job)
+
+
+async def test_index_only_plain_load_jobs() -> None:
+    """Test jobs that do more than set loads, or cannot be keyed, are skipped."""
+    api = FakeApi(
+        {
+            1: {"id": 1, "target_states": [{"load": 3, "bri": 0}]},
+            2: {
+                "id": 2,
+                "target_states": [{"load": 4, "bri": 0}],
+                "scripts": ["notify"],
+            },
+            3: {
+                "id": 3,
+                "target_states": [{"load": 5, "bri": 0}],
+                "scripts": [],
+                "flag_values": [],
+            },
+            4: {"id": 4, "target_states": [{"load": 6, "rgb": {"r": 255}}]},
+            5: {"id": 5, "target_states": [{"load": 7, "bri": 0}, {"load": 7}]},
+        }
+    )
+    index = SceneIndex()
+    await index.async_build(api, [_scene(job) for job in (1, 2, 3, 4, 5, 6)])
+
+    assert index.match({3: {"bri": 0}}) == 1
+    assert index.match({4: {"bri": 0}}) is None
+    # empty extra fields do not run anything
+    assert index.match({5: {"bri": 0}}) == 3
+    assert index.match({7: {"bri": 0}}) is None
+
+
+async def test_index_rebuilt_from_live_scenes(
+    hass: HomeAssistant, gateway: simulator.Gateway
+) -> None:
+    """Test a start from the cache indexes the scenes the gateway has now."""
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        data={"host": gateway.host, "apikey": simulator.APIKEY},
+        options={CONF_SCENE_OPTIMIZER: True},
+    )
+    entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+    assert await hass.config_entries.async_unload(entry.entry_id)
+
+    # a scene added on the gateway after the discovery was cached
+    motors = [target["load"] for target in gateway.jobs[212]["target_states"]]
+    half = {load: {"level": 5000, "tilt": 4} for load in motors}
+    gateway.jobs[214] = {
+        "id": 214,
+        "target_states": [{"load": load, **half[load]} for load in motors],
+    }
+    gateway.scenes.append(
+        {"id": 215, "name": "Alle Storen halb", "type": 20, "kind": 24, "job": 214}
+    )
+
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    hub = hass.data[DOMAIN][entry.entry_id]
+    async with asyncio.timeout(SETTLE_TIMEOUT):
+        while hub.scene_index.match(half) != 214:
+            await asyncio.sleep(0.05)
+    await hass.async_block_till_done()
+    assert await hass.config_entries.async_unload(entry.entry_id)